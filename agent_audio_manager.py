@@ -1,11 +1,19 @@
 import os
 import random
 import pygame
-import time
+
+from clip_cache import ClipStore
+from audio_scheduler import get_scheduler, CRITICAL, REFLEX
 
 # --- Configuration & Paths ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SOUND_DIR = os.path.join(BASE_DIR, "assets", "audio")
+CLIP_CACHE_DIR = os.path.join(BASE_DIR, "clip_cache")  # decoded PCM, see clip_cache.py
+LOAD_WORKERS = 3  # clips decoded at once
+CLIP_BUDGET_MB = 64  # decoded clips kept in memory (the 58 built-in ones take ~54 MB at 44.1 kHz stereo)
+CLIP_EVICTION = "lru"  # or "lfu": which clip goes first when the budget is full
+PREFETCH_PIPE_DIST = 150  # px: near a pipe, the next loss clips are loaded ahead of time
+REFLEX_EXPIRES_SEC = 1.5  # a reaction that could not start this long after its delay is dropped
 
 
 # Helper to keep the dictionary clean
@@ -90,62 +98,73 @@ AGENT_AUDIO_PATHS = {
     }
 }
 
-# --- Global State ---
-_intro_sound = None
-_outro_sound = None
+# Clips load in this order (the intro plays first, losses are the most frequent)
+LOAD_ORDER = [
+    ("MISC", AGENT_AUDIO_PATHS["MISC"]),
+    ("PIPE", AGENT_AUDIO_PATHS["LOSS"]["PIPE"]),
+    ("GROUND", AGENT_AUDIO_PATHS["LOSS"]["GROUND"]),
+    ("HIGH_SCORE", AGENT_AUDIO_PATHS["ACHIEVEMENT"]["HIGH_SCORE"]),
+    ("WIN", AGENT_AUDIO_PATHS["ACHIEVEMENT"]["WIN"]),
+]
 
-_pipe_loss_sounds = []
-_ground_loss_sounds = []
-_score_sounds = []
-_win_sounds = []
+# --- Global State ---
+# Startup only registers clip paths; the Sounds live in a budgeted store
+_categories = {}  # category -> existing clip paths, sorted by key
+_store = None  # ClipStore, created by init_agent_sounds()
+_upcoming = {}  # category -> the clip it plays next (drawn early so it can be prefetched)
 
 _initialized = False
-_agent_channel = None
+_scheduler = None  # AudioScheduler: owns Channels 0 and 1, decides what the agent says when
 
-# --- Scheduling State (for non-blocking delays) ---
-_pending_sound = None  # The sound waiting to be played
-_scheduled_play_time = 0.0  # The exact timestamp when it should start
+# Own RNG for clip choice and reflex delay, so audio never shifts the game's pipe sequence
+_rng = random.Random()
 
-# allows main.py to tell us if the LLM is busy (thinking OR generating)
-_llm_is_busy = False 
+def seed_agent_audio(seed):
+    """Makes clip choices and reflex delays reproducible."""
+    _rng.seed(seed)
+    _upcoming.clear()
 
 def set_llm_busy_state(is_busy: bool):
     """
-    Called by Main Loop.
-    If True, prevents any new reflex sounds from being scheduled.
+    Called by Main Loop while the LLM is thinking or generating speech.
+    If True, reflex sounds wait (and expire) instead of starting.
     """
-    global _llm_is_busy
-    _llm_is_busy = is_busy
-
-def _load_sound(abs_path: str):
-    """Loads a single sound file from an absolute path."""
-    if not os.path.exists(abs_path):
-        # print(f"[AgentSounds] MISSING file: {abs_path}")
-        return None
-    try:
-        snd = pygame.mixer.Sound(abs_path)
-        return snd
-    except pygame.error as e:
-        print(f"[AgentSounds] Error loading {abs_path}: {e}")
-        return None
-
-
-def _load_from_dict(path_dict):
-    """Iterates over a dictionary of paths and returns a list of loaded sounds."""
-    loaded_sounds = []
-    # Sorting keys ensures p_loss_01 is loaded before p_loss_02, etc.
-    for key in sorted(path_dict.keys()):
-        path = path_dict[key]
-        snd = _load_sound(path)
-        if snd is not None:
-            loaded_sounds.append(snd)
-    return loaded_sounds
+    if _scheduler is not None:
+        _scheduler.set_hold("llm", is_busy)
+
+def _register(path_dict):
+    """Existing clip paths of a dictionary (missing files are skipped, as before)."""
+    # Sorting keys keeps p_loss_01 before p_loss_02, etc. (clip choice depends on the order)
+    return [path_dict[key] for key in sorted(path_dict.keys()) if os.path.exists(path_dict[key])]
+
+
+def _next_clip(category):
+    """The clip this category plays next; drawn once, then kept until it is played."""
+    path = _upcoming.get(category)
+    if path is None and _categories.get(category):
+        path = _upcoming[category] = _rng.choice(_categories[category])
+    return path
+
+
+def prefetch_agent_audio(state, high_score):
+    """
+    Called every frame while the bird is alive: loads the clips the next
+    events are likely to need (a no-op once they are resident).
+    """
+    if _store is None:
+        return
+    wanted = [_next_clip("GROUND")]
+    if state["next_pipe_dist_x"] < PREFETCH_PIPE_DIST:
+        wanted.append(_next_clip("PIPE"))
+    if state["score"] + 1 >= high_score:
+        wanted.append(_next_clip("HIGH_SCORE"))
+    wanted = [path for path in wanted if path is not None and path not in _store]
+    if wanted:
+        _store.prefetch(wanted)
 
 
 def init_agent_sounds():
-    global _initialized, _agent_channel
-    global _intro_sound, _outro_sound
-    global _pipe_loss_sounds, _ground_loss_sounds, _score_sounds, _win_sounds
+    global _initialized, _scheduler, _store
 
     if _initialized:
         return
@@ -153,96 +172,87 @@ def init_agent_sounds():
     if pygame.mixer.get_init() is None:
         pygame.mixer.init()
 
-    # Reserve Channel 0 explicitly for the agent
-    pygame.mixer.set_reserved(1)
-    _agent_channel = pygame.mixer.Channel(0)
-
-    # --- Load Sounds from Dictionary ---
-    print("[AgentSounds] Loading audio assets...")
-
-    # Misc
-    _intro_sound = _load_sound(AGENT_AUDIO_PATHS["MISC"]["intro"])
-    _outro_sound = _load_sound(AGENT_AUDIO_PATHS["MISC"]["outro"])
+    # Channel 0 (clips) and Channel 1 (LLM speech) are reserved by the scheduler
+    _scheduler = get_scheduler()
 
-    # Losses
-    _pipe_loss_sounds = _load_from_dict(AGENT_AUDIO_PATHS["LOSS"]["PIPE"])
-    _ground_loss_sounds = _load_from_dict(AGENT_AUDIO_PATHS["LOSS"]["GROUND"])
+    # --- Register Sounds, decode them in the background (while they fit the budget) ---
+    for category, path_dict in LOAD_ORDER:
+        _categories[category] = _register(path_dict)
 
-    # Achievements
-    _score_sounds = _load_from_dict(AGENT_AUDIO_PATHS["ACHIEVEMENT"]["HIGH_SCORE"])
-    _win_sounds = _load_from_dict(AGENT_AUDIO_PATHS["ACHIEVEMENT"]["WIN"])
+    _store = ClipStore(CLIP_CACHE_DIR, CLIP_BUDGET_MB * 1024 * 1024, policy=CLIP_EVICTION,
+                       workers=LOAD_WORKERS)
+    for category, _ in LOAD_ORDER:
+        job = _store.warm(_categories[category])
+        job.add_done_callback(lambda job, category=category: _report_loaded(category, job))
 
     _initialized = True
     print(
-        f"[AgentSounds] Loaded: {_pipe_loss_sounds.__len__()} pipe, {_ground_loss_sounds.__len__()} ground, {_score_sounds.__len__()} score, {_win_sounds.__len__()} win.")
+        f"[AgentSounds] Registered: {len(_categories['PIPE'])} pipe, {len(_categories['GROUND'])} ground, "
+        f"{len(_categories['HIGH_SCORE'])} score, {len(_categories['WIN'])} win (loading in background).")
+
+
+def _report_loaded(category, job):
+    if job.cancelled():
+        return
+    if job.exception() is not None:
+        print(f"[AgentSounds] Loader Error: {job.exception()}")
+    else:
+        print(f"[AgentSounds] Loaded {category}: {job.result()}/{len(_categories[category])} clips.")
 
 
 def update_agent_audio():
     """
     Called every frame by the game loop.
-    Checks if a scheduled sound is ready to be played.
+    Starts whatever the scheduler has due (clips and LLM speech alike).
     """
-    global _agent_channel, _pending_sound, _scheduled_play_time
-
-    if _pending_sound is None:
-        return
-
-    # If enough time has passed since we scheduled the sound
-    if time.time() >= _scheduled_play_time:
-        # Verify one last time that the channel is actually free
-        if not _agent_channel.get_busy():
-            print("[AgentSounds] Delay over -> Playing now.")
-            _agent_channel.play(_pending_sound)
+    if _scheduler is not None:
+        _scheduler.update()
 
-        # Clear the schedule (it's either played or discarded if busy)
-        _pending_sound = None
 
-
-def _attempt_play_sound(sound, label: str):
+def _attempt_play_sound(sound, label: str, critical=False):
     """
-    1. If Agent is speaking -> Ignore.
-    2. If Agent is 'thinking' (waiting to speak) -> Ignore.
-    3. Otherwise -> Schedule the sound.
+    Critical sounds (intro / outro) are always played, cutting off anything else.
+    Reflexes start after a short 'thinking' delay, wait while the agent's voice
+    is busy and are dropped if they cannot start in time; while one reflex is
+    queued, further ones are ignored.
     """
-    global _agent_channel, _pending_sound, _scheduled_play_time, _llm_is_busy
-
-    if sound is None or _agent_channel is None:
+    if sound is None or _scheduler is None:
         return
 
-    # Check 1: Is the reflex channel already busy?
-    if _agent_channel.get_busy(): return
-
-    # If the LLM is Thinking, Generating, or Speaking, we suppress the reflex.
-    if _llm_is_busy: return
+    if critical:
+        _scheduler.play(sound, CRITICAL, label=label)
+        print(f"[AgentSounds] Event '{label}' accepted.")
+        return
 
-    # Check 2: Is the agent currently "thinking" about a previous reflex?
-    if _pending_sound is not None: return
+    delay = _rng.uniform(0.2, 0.5)
+    if _scheduler.play(sound, REFLEX, delay=delay, expires_in=REFLEX_EXPIRES_SEC, label=label, key="reflex"):
+        print(f"[AgentSounds] Event '{label}' accepted. Will speak in {round(delay, 2)}s...")
 
-    # If free, schedule the sound
-    _pending_sound = sound
-    delay = random.uniform(0.2, 0.5)
-    _scheduled_play_time = time.time() + delay
 
-    print(f"[AgentSounds] Event '{label}' accepted. Will speak in {round(delay, 2)}s...")
+def _play_random(category, label: str):
+    path = _next_clip(category)
+    if path is None:
+        return
+    del _upcoming[category]
+    _attempt_play_sound(_store.get(path), label)
 
 
-def _play_random(sounds, label: str):
-    if not sounds:
-        return
-    snd = random.choice(sounds)
-    _attempt_play_sound(snd, label)
+def _play_misc(name, label: str):
+    path = AGENT_AUDIO_PATHS["MISC"][name]
+    if path in _categories.get("MISC", ()):
+        _attempt_play_sound(_store.get(path), label, critical=True)
 
 
 # ---------- Public helpers ----------
 
-def play_intro(): _attempt_play_sound(_intro_sound, "intro")
+def play_intro(): _play_misc("intro", "intro")
 
-def play_outro(): _attempt_play_sound(_outro_sound, "outro")
+def play_outro(): _play_misc("outro", "outro")
 
-def play_pipe_loss(): _play_random(_pipe_loss_sounds, "pipe_loss")
+def play_pipe_loss(): _play_random("PIPE", "pipe_loss")
 
-def play_ground_loss(): _play_random(_ground_loss_sounds, "ground_loss")
+def play_ground_loss(): _play_random("GROUND", "ground_loss")
 
-def play_high_score(): _play_random(_score_sounds, "high_score")
+def play_high_score(): _play_random("HIGH_SCORE", "high_score")
 
-def play_game_win(): _play_random(_win_sounds, "game_win")
\ No newline at end of file
+def play_game_win(): _play_random("WIN", "game_win")
@@ -0,0 +1,192 @@
+"""
+Agent worker: one long-lived asyncio loop in a background thread.
+
+The game thread hands work over with call_soon_threadsafe() into an
+asyncio.Queue; nothing blocks a thread on a queue.Queue and nothing polls
+per frame. Results come back through callbacks, which run on the loop's
+thread (so they should only hand the result over, e.g. into a queue.Queue):
+
+    worker = AgentWorker(runner, on_sentence=..., on_draft=...).start()
+    turn = worker.submit(message)       # a player turn (cancels the previous one)
+    worker.speculate(death_id, message) # a draft, runs alongside turns
+
+on_sentence(turn, sentence, starts_new_reply) fires for every sentence of
+a streamed reply as soon as it is complete; turn is the number submit()
+returned, so late sentences of a cancelled reply can be recognized.
+on_draft(death_id, text) fires once per speculative draft. Every request runs in its own throwaway agent
+session: the message itself carries the bounded context (conversation.py).
+"""
+import asyncio
+import threading
+from typing import Callable, Optional
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.genai import types
+
+from speech_tools import SentenceSplitter
+
+
+class AgentWorker:
+    def __init__(self, runner,
+                 on_sentence: Callable[[int, str, bool], None],
+                 on_draft: Optional[Callable[[int, str], None]] = None,
+                 user_id: str = "player_1"):
+        self.runner = runner
+        self.on_sentence = on_sentence
+        self.on_draft = on_draft
+        self.user_id = user_id
+
+        self.loop = asyncio.new_event_loop()
+        self._inbox: Optional[asyncio.Queue] = None  # created on the loop
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="agent-loop", daemon=True)
+
+        self._turn: Optional[asyncio.Task] = None  # the reply being generated
+        self._drafts = set()  # speculative drafts in flight
+        # Each counter is written by one thread only: turns posted vs. picked up by the loop
+        self._posted = 0  # game thread
+        self._picked = 0  # loop thread
+        self._turn_running = False
+
+    @property
+    def busy(self) -> bool:
+        """True while a player turn is queued or generating (drafts do not count)."""
+        return self._picked < self._posted or self._turn_running
+
+    # --- Called from the game thread ---
+
+    def start(self) -> "AgentWorker":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def submit(self, message: str) -> int:
+        """
+        Starts a reply to a player turn; a reply still generating is cancelled as stale.
+        Returns the turn number its sentences will carry.
+        """
+        self._posted += 1
+        self._post(("turn", self._posted, message))
+        return self._posted
+
+    def speculate(self, death_id: int, message: str) -> None:
+        self._post(("draft", death_id, message))
+
+    def cancel(self) -> None:
+        """Drops the reply being generated, if any."""
+        self._post(("cancel",))
+
+    def close(self, timeout: float = 2.0) -> None:
+        self._post(("close",))
+        self._thread.join(timeout)
+
+    def _post(self, item) -> None:
+        self.loop.call_soon_threadsafe(self._inbox.put_nowait, item)
+
+    # --- Loop thread ---
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._dispatch())
+        finally:
+            self.loop.close()
+
+    async def _dispatch(self):
+        self._inbox = asyncio.Queue()
+        self._ready.set()
+        print(" [System] Agent Brain Online (Background Thread)")
+        while True:
+            item = await self._inbox.get()
+            kind = item[0]
+            if kind == "turn":
+                self._cancel_turn()
+                self._turn_running = True
+                self._picked = item[1]
+                self._turn = asyncio.create_task(self._run_turn(item[1], item[2]))
+            elif kind == "draft":
+                task = asyncio.create_task(self._draft(item[1], item[2]))
+                self._drafts.add(task)
+                task.add_done_callback(self._drafts.discard)
+            elif kind == "cancel":
+                self._cancel_turn()
+            elif kind == "close":
+                self._cancel_turn()
+                pending = list(self._drafts) + ([self._turn] if self._turn else [])
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+
+    def _cancel_turn(self):
+        if self._turn is not None and not self._turn.done():
+            print("[Worker] Stale turn cancelled")
+            self._turn.cancel()
+        # A task cancelled before its first step never reaches its finally block
+        self._turn_running = False
+
+    async def _new_session(self) -> str:
+        session = await self.runner.session_service.create_session(app_name=self.runner.app_name,
+                                                                   user_id=self.user_id)
+        return session.id
+
+    async def _drop_session(self, session_id: str) -> None:
+        await self.runner.session_service.delete_session(app_name=self.runner.app_name, user_id=self.user_id,
+                                                         session_id=session_id)
+
+    async def _run_turn(self, turn: int, message: str):
+        """Streams one reply and hands it out sentence by sentence."""
+        splitter = SentenceSplitter()
+        first = True
+        session_id = await self._new_session()
+        try:
+            agent_input = types.Content(role="user", parts=[types.Part(text=message)])
+            streamed = False
+            async for event in self.runner.run_async(user_id=self.user_id, session_id=session_id,
+                                                     new_message=agent_input,
+                                                     run_config=RunConfig(streaming_mode=StreamingMode.SSE)):
+                if not (event.content and event.content.parts):
+                    continue
+                text = "".join(part.text for part in event.content.parts if part.text)
+                if not text:
+                    continue
+                if event.partial:
+                    streamed = True
+                elif streamed:
+                    break  # Final event repeats the chunks we already split
+                for sentence in splitter.feed(text):
+                    self.on_sentence(turn, sentence, first)
+                    first = False
+                if not event.partial:
+                    break
+            rest = splitter.flush()
+            if rest:
+                self.on_sentence(turn, rest, first)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Worker] Agent Brain Error: {e}")
+        finally:
+            await self._drop_session(session_id)
+            if self._turn is asyncio.current_task():
+                self._turn_running = False
+
+    async def _draft(self, death_id: int, message: str):
+        """One whole speculative reply, outside the conversation."""
+        session_id = await self._new_session()
+        try:
+            agent_input = types.Content(role="user", parts=[types.Part(text=message)])
+            async for event in self.runner.run_async(user_id=self.user_id, session_id=session_id,
+                                                     new_message=agent_input):
+                if event.content and event.content.parts:
+                    part = event.content.parts[0]
+                    if part.text:
+                        if self.on_draft is not None:
+                            self.on_draft(death_id, part.text.strip())
+                        break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Worker] Speculation Error: {e}")
+        finally:
+            await self._drop_session(session_id)
@@ -0,0 +1,225 @@
+"""
+One scheduler for everything the agent says.
+
+The agent has one voice, spread over two reserved mixer channels:
+Channel 0 plays prerecorded clips (agent_audio_manager) and Channel 1 plays
+synthesized LLM speech (speech_tools). Every sound goes through play() with
+a priority, an optional start delay and an optional expiry deadline, and
+one update() per frame (from FlappyGame.frame_step) decides what starts:
+
+    CRITICAL  intro / outro: never dropped, cut off anything else
+    SPEECH    LLM reply segments: played gaplessly in order; wait for a clip
+              that is already playing instead of talking over it
+    REFLEX    reaction clips: wait while the voice is busy or held (the LLM
+              is thinking) and are dropped once their deadline passes
+    SFX       plain sound effects on any free unreserved channel
+
+Entries wait in a heap ordered by start time; once due they move to a heap
+ordered by (priority, arrival). Both are O(log n) per entry. Cancelled and
+expired entries are discarded lazily when they reach the top.
+"""
+import heapq
+import itertools
+import time
+from typing import Optional
+
+import pygame
+
+CRITICAL = 0
+SPEECH = 1
+REFLEX = 2
+SFX = 3
+
+CLIP_CHANNEL = 0
+SPEECH_CHANNEL = 1
+
+# Which playing priorities each priority may cut off
+PREEMPTS = {
+    CRITICAL: (SPEECH, REFLEX),
+}
+
+
+class _Entry:
+    __slots__ = ("sound", "priority", "due", "expires", "label", "key", "seq", "cancelled")
+
+    def __init__(self, sound, priority, due, expires, label, key, seq):
+        self.sound = sound
+        self.priority = priority
+        self.due = due
+        self.expires = expires
+        self.label = label
+        self.key = key
+        self.seq = seq
+        self.cancelled = False
+
+
+class AudioScheduler:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._seq = itertools.count()
+        self._timers = []  # (due, seq, entry): not due yet
+        self._ready = []  # (priority, seq, entry): due, waiting for the voice
+        self._keys = {}  # coalescing key -> queued entry
+        self._holds = set()  # reasons reflexes have to wait (e.g. "llm")
+        self._pending_voice = 0  # queued voice entries, cancelled ones excluded
+        self._playing = {}  # channel id -> priority of what was started there
+
+        # Both voice channels are ours; Sound.play() never picks them
+        pygame.mixer.set_reserved(2)
+        self._channels = {CLIP_CHANNEL: pygame.mixer.Channel(CLIP_CHANNEL),
+                          SPEECH_CHANNEL: pygame.mixer.Channel(SPEECH_CHANNEL)}
+
+    # --- Scheduling ---
+
+    def play(self, sound, priority: int, delay: float = 0.0, expires_in: Optional[float] = None,
+             label: str = "", key: Optional[str] = None) -> bool:
+        """
+        Queues a sound to start after delay seconds. expires_in drops it if it
+        cannot start within that many seconds after becoming due. With a key,
+        the sound is dropped while another one with the same key is queued.
+        Returns False if it was dropped right away.
+        """
+        if sound is None:
+            return False
+        if key is not None and key in self._keys:
+            return False
+        now = self.clock()
+        due = now + delay
+        expires = None if expires_in is None else due + expires_in
+        entry = _Entry(sound, priority, due, expires, label, key, next(self._seq))
+        if key is not None:
+            self._keys[key] = entry
+        if priority != SFX:
+            self._pending_voice += 1
+        if delay > 0:
+            heapq.heappush(self._timers, (due, entry.seq, entry))
+        else:
+            heapq.heappush(self._ready, (priority, entry.seq, entry))
+        return True
+
+    def stop(self, priority: int) -> None:
+        """Drops every queued sound of a priority and silences it if playing (e.g. a cancelled reply)."""
+        self._drop_queued(priority)
+        for channel_id, playing in list(self._playing.items()):
+            if playing == priority:
+                self._channels[channel_id].stop()
+                del self._playing[channel_id]
+
+    def set_hold(self, reason: str, active: bool) -> None:
+        """While any hold is active, reflexes wait (and may expire) instead of starting."""
+        if active:
+            self._holds.add(reason)
+        else:
+            self._holds.discard(reason)
+
+    # --- State ---
+
+    def is_playing(self, priority: Optional[int] = None) -> bool:
+        """True while a voice channel plays (something of the given priority)."""
+        self._refresh()
+        if priority is None:
+            return bool(self._playing)
+        return priority in self._playing.values()
+
+    @property
+    def voice_busy(self) -> bool:
+        """True while the agent is saying something or has something queued to say."""
+        return self._pending_voice > 0 or self.is_playing()
+
+    # --- Per Frame ---
+
+    def update(self) -> None:
+        now = self.clock()
+        while self._timers and self._timers[0][0] <= now:
+            _, seq, entry = heapq.heappop(self._timers)
+            if not entry.cancelled:
+                heapq.heappush(self._ready, (entry.priority, seq, entry))
+
+        self._refresh()
+        while self._ready:
+            entry = self._ready[0][2]
+            if entry.cancelled:
+                heapq.heappop(self._ready)
+                continue
+            if entry.expires is not None and now > entry.expires:
+                heapq.heappop(self._ready)
+                self._discard(entry)
+                if entry.label:
+                    print(f"[AudioScheduler] '{entry.label}' expired")
+                continue
+            if entry.priority == SFX:
+                heapq.heappop(self._ready)
+                self._discard(entry)
+                entry.sound.play()
+                continue
+            if not self._start(entry):
+                break  # Everything behind the most important sound waits too
+            heapq.heappop(self._ready)
+            self._discard(entry)
+
+    def _refresh(self):
+        for channel_id in list(self._playing):
+            if not self._channels[channel_id].get_busy():
+                del self._playing[channel_id]
+
+    def _start(self, entry) -> bool:
+        """Starts a voice entry if the rules allow it right now."""
+        channel_id = SPEECH_CHANNEL if entry.priority == SPEECH else CLIP_CHANNEL
+        channel = self._channels[channel_id]
+
+        if entry.priority == SPEECH and self._playing.get(SPEECH_CHANNEL) == SPEECH:
+            # Next segment of the reply: queue it behind the current one (a Channel holds one)
+            if channel.get_queue() is not None:
+                return False
+            channel.queue(entry.sound)
+            return True
+
+        if entry.priority >= REFLEX and self._holds:
+            return False
+
+        if self._playing:
+            cut = PREEMPTS.get(entry.priority, ())
+            if any(playing not in cut for playing in self._playing.values()):
+                return False
+            for playing_id, playing in list(self._playing.items()):
+                self._channels[playing_id].stop()
+                print(f"[AudioScheduler] '{entry.label}' cuts off channel {playing_id}")
+                if playing == SPEECH:
+                    # The rest of a cut-off reply would resume mid-sentence; drop it too
+                    self._drop_queued(SPEECH)
+            self._playing.clear()
+
+        if entry.label:
+            print(f"[AudioScheduler] Playing '{entry.label}'")
+        channel.play(entry.sound)
+        self._playing[channel_id] = entry.priority
+        return True
+
+    def _drop_queued(self, priority):
+        for heap in (self._timers, self._ready):
+            for _, _, entry in heap:
+                if entry.priority == priority and not entry.cancelled:
+                    self._discard(entry)
+
+    def _discard(self, entry):
+        """Takes an entry out of the bookkeeping (it stays in its heap until popped)."""
+        if entry.cancelled:
+            return
+        entry.cancelled = True
+        if entry.key is not None and self._keys.get(entry.key) is entry:
+            del self._keys[entry.key]
+        if entry.priority != SFX:
+            self._pending_voice -= 1
+
+
+_scheduler = None
+
+
+def get_scheduler() -> AudioScheduler:
+    """The process-wide scheduler (created on first use; needs the mixer)."""
+    global _scheduler
+    if _scheduler is None:
+        if pygame.mixer.get_init() is None:
+            pygame.mixer.init()
+        _scheduler = AudioScheduler()
+    return _scheduler
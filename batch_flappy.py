@@ -0,0 +1,266 @@
+"""
+Vectorized batch simulator: N independent Flappy worlds in NumPy arrays.
+
+Reproduces FlappyCore frame for frame (same constants, same spawn range as
+get_random_pipes, same mask geometry) but advances every world with a
+handful of array operations, so bot policies and difficulty settings can
+be evaluated over many thousands of episodes per second:
+
+    sim = BatchFlappy(4096, seed=1)
+    results = sim.run(my_policy, episodes=100_000)
+
+A policy receives the observation dict from observe() (arrays of length N)
+and returns a boolean "jump" array.
+
+Worlds start already in flight (the state right after the first jump on
+the start screen), and a dead world stays frozen until reset.
+"""
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from game_core import (
+    SCREEN_WIDHT,
+    SCREEN_HEIGHT,
+    SPEED,
+    GRAVITY,
+    GAME_SPEED,
+    GROUND_HEIGHT,
+    PIPE_WIDHT,
+    PIPE_HEIGHT,
+    PIPE_GAP,
+    BIRD_X,
+    collision_masks,
+    mask_row_spans,
+)
+
+# --- Death causes (int codes in the result arrays) ---
+ALIVE = 0
+DEATH_GROUND = 1
+DEATH_PIPE = 2
+TIMEOUT = 3
+DEATH_CAUSES = {DEATH_GROUND: "ground", DEATH_PIPE: "pipe", TIMEOUT: "timeout"}
+
+# --- Mask geometry (per-row spans, computed once) ---
+_geometry = None
+
+
+def _mask_geometry():
+    """Row spans of the bird, pipe and inverted pipe masks as int arrays."""
+    global _geometry
+    if _geometry is None:
+        masks = collision_masks()
+        _geometry = {
+            name: np.array(mask_row_spans(masks[name]), dtype=np.int64)
+            for name in ("bird", "pipe", "pipe_inverted")
+        }
+    return _geometry
+
+
+class BatchFlappy:
+    def __init__(self, n: int, seed: Optional[int] = None,
+                 gravity: float = GRAVITY,
+                 flap_speed: float = SPEED,
+                 game_speed: int = GAME_SPEED,
+                 pipe_gap: int = PIPE_GAP):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+
+        # Difficulty settings
+        self.gravity = gravity
+        self.flap_speed = flap_speed
+        self.game_speed = game_speed
+        self.pipe_gap = pipe_gap
+
+        geometry = _mask_geometry()
+        bird = geometry["bird"]
+        self._bird_rows = np.nonzero(bird[:, 0] <= bird[:, 1])[0]
+        self._bird_lo = bird[self._bird_rows, 0]
+        self._bird_hi = bird[self._bird_rows, 1]
+        self._pipe_spans = geometry["pipe"]
+        self._pipe_inv_spans = geometry["pipe_inverted"]
+
+        # World state
+        self.bird_x = int(BIRD_X)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.velocity = np.zeros(n, dtype=np.float64)
+        self.pipe_x = np.zeros((n, 2), dtype=np.int64)
+        self.pipe_size = np.zeros((n, 2), dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.passed = np.zeros(n, dtype=bool)
+        self.alive = np.zeros(n, dtype=bool)
+        self.death_cause = np.zeros(n, dtype=np.int8)
+
+        self.reset()
+
+    def _random_sizes(self, shape):
+        # random.randint(100, 300) is inclusive on both ends
+        return self.rng.integers(100, 301, size=shape)
+
+    def reset(self, worlds: Optional[np.ndarray] = None):
+        """Restarts the selected worlds (boolean mask or indices; all if None)."""
+        if worlds is None:
+            worlds = np.ones(self.n, dtype=bool)
+        count = np.count_nonzero(worlds) if worlds.dtype == bool else len(worlds)
+
+        self.y[worlds] = SCREEN_HEIGHT // 2
+        self.velocity[worlds] = -self.flap_speed
+        self.pipe_x[worlds] = [800, SCREEN_WIDHT + 800]
+        self.pipe_size[worlds] = self._random_sizes((count, 2))
+        self.score[worlds] = 0
+        self.ticks[worlds] = 0
+        self.passed[worlds] = False
+        self.alive[worlds] = True
+        self.death_cause[worlds] = ALIVE
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        """Batched equivalent of FlappyCore.get_state(), plus velocity."""
+        # Pipes stay sorted by x, so the next one is pair 0 unless the bird is past it
+        past_first = self.pipe_x[:, 0] + PIPE_WIDHT <= self.bird_x
+        next_x = np.where(past_first, self.pipe_x[:, 1], self.pipe_x[:, 0])
+        next_size = np.where(past_first, self.pipe_size[:, 1], self.pipe_size[:, 0])
+        return {
+            "player_y": self.y,
+            "velocity": self.velocity,
+            "next_pipe_dist_x": next_x - self.bird_x,
+            "next_pipe_y": SCREEN_HEIGHT - next_size,
+            "is_alive": self.alive,
+            "score": self.score,
+        }
+
+    def step(self, jump: np.ndarray) -> np.ndarray:
+        """
+        Advances every living world by one frame.
+        Returns the boolean mask of worlds that died on this frame.
+        """
+        live = self.alive
+        # Plain slices are much cheaper than boolean masks when nobody is dead
+        sel = slice(None) if live.all() else live
+
+        self.ticks[sel] += 1
+        self.velocity[live & jump] = -self.flap_speed
+
+        # Scoring (same order as FlappyCore.step: before pipes move)
+        scored = live & ~self.passed & (self.pipe_x[:, 0] <= BIRD_X)
+        self.passed |= scored
+        self.score += scored
+
+        # Recycle the pair that left the screen
+        recycle = live & (self.pipe_x[:, 0] < -PIPE_WIDHT)
+        if recycle.any():
+            count = np.count_nonzero(recycle)
+            self.pipe_x[recycle, 0] = self.pipe_x[recycle, 1]
+            self.pipe_size[recycle, 0] = self.pipe_size[recycle, 1]
+            self.pipe_x[recycle, 1] = SCREEN_WIDHT * 2
+            self.pipe_size[recycle, 1] = self._random_sizes(count)
+            self.passed[recycle] = False
+
+        # Physics (pygame.Rect truncates toward zero)
+        self.velocity[sel] += self.gravity
+        self.y[sel] = np.trunc(self.y[sel] + self.velocity[sel])
+        self.pipe_x[sel] -= self.game_speed
+
+        hit_ground, hit_pipe = self._collisions(live)
+        died = hit_ground | hit_pipe
+        self.alive &= ~died
+        self.death_cause[hit_ground] = DEATH_GROUND
+        self.death_cause[hit_pipe & ~hit_ground] = DEATH_PIPE
+        return died
+
+    def _collisions(self, live):
+        hit_ground = np.zeros(self.n, dtype=bool)
+        hit_pipe = np.zeros(self.n, dtype=bool)
+
+        # Bounding-box cull first; only the survivors get the per-row test.
+        # The ground spans the whole screen width, rows ground_top..SCREEN_HEIGHT.
+        ground_top = SCREEN_HEIGHT - GROUND_HEIGHT
+        bird_top = self.y + self._bird_rows[0]
+        bird_bottom = self.y + self._bird_rows[-1]
+        near_ground = np.nonzero(live & (bird_bottom >= ground_top) & (bird_top < SCREEN_HEIGHT))[0]
+        if len(near_ground):
+            rows = self.y[near_ground, None] + self._bird_rows[None, :]
+            hit_ground[near_ground] = ((rows >= ground_top) & (rows < SCREEN_HEIGHT)).any(axis=1)
+
+        # Only pair 0 can reach the bird: pair 1 is a full screen width behind it
+        bird_left = self.bird_x + self._bird_lo.min()
+        bird_right = self.bird_x + self._bird_hi.max()
+        pipe_x = self.pipe_x[:, 0]
+        near_pipe = np.nonzero(live & (pipe_x <= bird_right) & (pipe_x + PIPE_WIDHT > bird_left))[0]
+        if len(near_pipe):
+            rows = self.y[near_pipe, None] + self._bird_rows[None, :]
+            bird_lo = self.bird_x + self._bird_lo[None, :]
+            bird_hi = self.bird_x + self._bird_hi[None, :]
+            x = pipe_x[near_pipe, None]
+            size = self.pipe_size[near_pipe, 0:1]
+            bottom_y = SCREEN_HEIGHT - size
+            top_y = -(PIPE_HEIGHT - (SCREEN_HEIGHT - size - self.pipe_gap))
+            hit_pipe[near_pipe] = \
+                self._overlaps(rows - bottom_y, x, bird_lo, bird_hi, self._pipe_spans) | \
+                self._overlaps(rows - top_y, x, bird_lo, bird_hi, self._pipe_inv_spans)
+
+        return hit_ground, hit_pipe
+
+    @staticmethod
+    def _overlaps(pipe_rows, pipe_x, bird_lo, bird_hi, spans):
+        inside = (pipe_rows >= 0) & (pipe_rows < PIPE_HEIGHT)
+        rows = np.clip(pipe_rows, 0, PIPE_HEIGHT - 1)
+        lo = pipe_x + spans[rows, 0]
+        hi = pipe_x + spans[rows, 1]
+        hit = inside & (np.maximum(lo, bird_lo) <= np.minimum(hi, bird_hi))
+        return hit.any(axis=1)
+
+    def run(self, policy: Callable[[Dict[str, np.ndarray]], np.ndarray],
+            episodes: int, max_ticks: int = 100_000) -> Dict[str, np.ndarray]:
+        """
+        Plays `episodes` finished games, restarting worlds as they die.
+        Games longer than max_ticks are cut off with the TIMEOUT cause.
+        Returns arrays of final score, duration (ticks) and death cause code.
+        """
+        scores = np.empty(episodes, dtype=np.int64)
+        durations = np.empty(episodes, dtype=np.int64)
+        causes = np.empty(episodes, dtype=np.int8)
+        done = 0
+
+        self.reset()
+        while done < episodes:
+            jump = np.asarray(policy(self.observe()), dtype=bool)
+            finished = self.step(jump)
+
+            timed_out = self.alive & (self.ticks >= max_ticks)
+            self.death_cause[timed_out] = TIMEOUT
+            finished |= timed_out
+
+            idx = np.nonzero(finished)[0][:episodes - done]
+            if len(idx):
+                scores[done:done + len(idx)] = self.score[idx]
+                durations[done:done + len(idx)] = self.ticks[idx]
+                causes[done:done + len(idx)] = self.death_cause[idx]
+                done += len(idx)
+                self.reset(finished)
+
+        return {"score": scores, "duration_ticks": durations, "death_cause": causes}
+
+
+def gap_follower(obs):
+    """Baseline bot: flap while falling below the middle of the next gap."""
+    return (obs["velocity"] > 0) & (obs["player_y"] > obs["next_pipe_y"] - 50)
+
+
+if __name__ == "__main__":
+    sim = BatchFlappy(8192, seed=0)
+
+    def sloppy_player(obs):
+        # The baseline bot with a shaky thumb: misses most of its flaps
+        return gap_follower(obs) & (sim.rng.random(sim.n) < 0.3)
+
+    start = time.perf_counter()
+    results = sim.run(sloppy_player, episodes=50_000)
+    elapsed = time.perf_counter() - start
+
+    causes = {name: int(np.count_nonzero(results["death_cause"] == code))
+              for code, name in DEATH_CAUSES.items()}
+    print(f"{len(results['score'])} episodes in {elapsed:.2f}s "
+          f"({len(results['score']) / elapsed:.0f} episodes/s)")
+    print(f"Mean score {results['score'].mean():.2f}, max {results['score'].max()}, causes {causes}")
@@ -0,0 +1,213 @@
+"""
+Decoded prerecorded agent clips: an on-disk PCM cache and an in-memory
+store with a byte budget.
+
+Decoding an MP3 costs milliseconds per clip; copying raw PCM into a Sound
+costs microseconds. The first launch decodes each clip once and stores its
+samples exactly as the mixer holds them, under the SHA-256 of the MP3's
+bytes plus the mixer format:
+
+    clip_cache/<sha256>_<freq>_<size>_<channels>.pcm
+
+Later launches (and every kiosk sharing the directory) load that file
+instead. Editing an MP3 changes its hash, so stale audio is never played;
+files are written atomically (temp file + os.replace).
+
+ClipStore keeps the decoded Sounds in memory, at most max_bytes of them.
+Past the budget it evicts the least recently used clip ("lru") or the
+least frequently played one, oldest first among equals ("lfu"). Clips are
+loaded on demand, or ahead of time on its loader threads:
+
+    store.warm(paths)      # startup: fill the free budget, never evicts
+    store.prefetch(paths)  # likely needed soon: load, evicting if needed
+    store.get(path)        # the Sound, decoded right now if not resident
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import pygame
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_clip(path: str, cache_dir: str) -> Optional[pygame.mixer.Sound]:
+    """
+    The clip at path as a Sound, from the PCM cache if possible.
+    Returns None if the file is missing or cannot be decoded.
+    Safe to call from worker threads.
+    """
+    try:
+        freq, size, channels = pygame.mixer.get_init()
+        cached = os.path.join(cache_dir, f"{file_digest(path)}_{freq}_{size}_{channels}.pcm")
+        if os.path.exists(cached):
+            with open(cached, "rb") as f:
+                return pygame.mixer.Sound(buffer=f.read())
+
+        sound = pygame.mixer.Sound(path)
+    except (OSError, pygame.error, TypeError) as e:  # TypeError: mixer already closed
+        print(f"[AgentSounds] Error loading {path}: {e}")
+        return None
+
+    # A unique temp file per writer: several threads may decode the same clip
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(sound.get_raw())
+        os.replace(tmp_path, cached)
+    except OSError as e:
+        print(f"[AgentSounds] Could not cache {path}: {e}")  # The clip itself is fine
+    return sound
+
+
+def sound_bytes(sound: pygame.mixer.Sound) -> int:
+    """Memory held by a Sound's samples (without copying them like get_raw())."""
+    freq, size, channels = pygame.mixer.get_init()
+    return int(round(sound.get_length() * freq)) * (abs(size) // 8) * channels
+
+
+class ClipStore:
+    def __init__(self, cache_dir: str, max_bytes: int, policy: str = "lru", workers: int = 3):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"unknown eviction policy: {policy}")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._lock = threading.Lock()  # loader threads insert while the game thread reads
+        self._sounds: "OrderedDict[str, pygame.mixer.Sound]" = OrderedDict()  # least recently used first
+        self._sizes: Dict[str, int] = {}
+        self._uses = Counter()  # plays per path, kept after eviction
+        self._loading: Dict[str, Future] = {}  # path -> its load in progress (one per path)
+        self._queued: Dict[str, Future] = {}  # path -> prefetch job not finished yet
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clip-loader")
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._sounds
+
+    def __len__(self) -> int:
+        return len(self._sounds)
+
+    def get(self, path: str) -> Optional[pygame.mixer.Sound]:
+        """
+        The Sound for a clip that is about to play; counts as a use.
+        If a loader is already decoding it, waits for that instead of decoding it twice.
+        """
+        with self._lock:
+            self._uses[path] += 1
+            sound = self._sounds.get(path)
+            if sound is not None:
+                self._sounds.move_to_end(path)
+                self.hits += 1
+                return sound
+            self.misses += 1
+            job, owner = self._claim(path)
+            queued = self._queued.get(path)
+            if not owner and queued is not None and queued.cancel():
+                owner = True  # Still waiting in the pool: load it here instead of waiting behind other jobs
+        if owner:
+            self._fill(path, job, evict=True)
+        return job.result()
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """Loads clips in the background (evicting others if needed); resident or loading ones are skipped."""
+        with self._lock:
+            todo = []
+            for path in paths:
+                if path not in self._sounds:
+                    job, owner = self._claim(path)
+                    if owner:
+                        todo.append((path, job))
+        for path, job in todo:
+            queued = self._pool.submit(self._fill, path, job, True)
+            with self._lock:
+                self._queued[path] = queued
+            queued.add_done_callback(lambda done, path=path: self._unqueue(path, done))
+
+    def warm(self, paths: Iterable[str]) -> Future:
+        """Background job loading clips while they fit the free budget; nothing is evicted."""
+        return self._pool.submit(self._warm, list(paths))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Loader threads ---
+
+    def _claim(self, path: str):
+        """(the load of path in progress, True if the caller has to perform it). Needs the lock."""
+        job = self._loading.get(path)
+        if job is not None:
+            return job, False
+        job = self._loading[path] = Future()
+        return job, True
+
+    def _unqueue(self, path: str, done: Future) -> None:
+        with self._lock:
+            if self._queued.get(path) is done:
+                del self._queued[path]
+
+    def _fill(self, path: str, job: Future, evict: bool) -> bool:
+        """Performs a claimed load; waiters get the Sound even if the budget kept it out."""
+        sound = None
+        inserted = False
+        try:
+            sound = load_clip(path, self.cache_dir)
+            inserted = sound is not None and self._insert(path, sound, evict)
+        finally:
+            with self._lock:
+                del self._loading[path]
+            job.set_result(sound)
+        return inserted
+
+    def _warm(self, paths) -> int:
+        loaded = 0
+        for path in paths:
+            with self._lock:
+                if path in self._sounds:
+                    continue
+                job, owner = self._claim(path)
+            if not owner:
+                continue  # Someone else is loading it
+            if self._fill(path, job, evict=False):
+                loaded += 1
+            elif job.result() is not None:
+                break  # Budget full
+        return loaded
+
+    def _insert(self, path: str, sound: pygame.mixer.Sound, evict: bool) -> bool:
+        size = sound_bytes(sound)
+        with self._lock:
+            if path in self._sounds:
+                return True
+            if self.total_bytes + size > self.max_bytes:
+                if not evict:
+                    return False
+                while self._sounds and self.total_bytes + size > self.max_bytes:
+                    self._evict_one()
+            # A clip bigger than the whole budget is still kept until the next insert
+            self._sounds[path] = sound
+            self._sizes[path] = size
+            self.total_bytes += size
+            return True
+
+    def _evict_one(self) -> None:
+        if self.policy == "lfu":
+            # Lowest play count; OrderedDict order breaks ties (least recently used first)
+            victim = min(self._sounds, key=self._uses.__getitem__)
+        else:
+            victim = next(iter(self._sounds))
+        # A playing Channel holds its own reference, so eviction never cuts a clip off
+        del self._sounds[victim]
+        self.total_bytes -= self._sizes.pop(victim)
+        self.evictions += 1
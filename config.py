@@ -3,8 +3,26 @@ MODEL_ID_SPEAK = "eleven_multilingual_v2" # low latency model (allegedly, I have
 MODEL_ID_LISTEN = "scribe_v1"  # STT
 GEMINI_MODEL = "gemini-2.5-flash"  # fast, big context window, and it's only 0.3 euros per million tokens
 # gonna switch to "gemini-2.0-flash" if it gets too expensive (0.1 euros per million tokens)
+CONTEXT_KEEP_TURNS = 4  # agent turns sent verbatim; older ones are folded into a one-line summary
 GAME_LOSS_THRESHOLD = 5
 GAME_TIME_THRESHOLD_SEC = 60
+DIRTY_RENDERING = True  # only push changed screen regions (LayeredDirty), for low-power machines
+TTS_STREAMING = True  # start playing agent speech on the first audio chunk instead of after the whole reply
+TTS_STREAM_FORMAT = "pcm_22050"  # raw 16-bit mono PCM, so chunks can be played without an MP3 decoder
+TTS_CACHE_DIR = "tts_cache"  # synthesized replies, reused when the agent repeats a phrase
+TTS_CACHE_MAX_MB = 200  # least recently used replies are deleted past this size
+TTS_WORKERS = 2  # ElevenLabs TTS calls running at once
+TTS_MAX_PENDING = 8  # further TTS jobs (reply sentences) allowed to wait; more than that are dropped
+TTS_TIMEOUT_SEC = 10  # per ElevenLabs TTS call
+STT_TIMEOUT_SEC = 15  # per ElevenLabs STT upload
+VAD_START_TIMEOUT_SEC = 5.0  # stop listening if the player has not started talking by then
+VAD_SILENCE_SEC = 0.8  # an utterance ends after this much quiet
+VAD_MAX_SPEECH_SEC = 10.0  # hard cap on one utterance
+VAD_MARGIN_DB = 10.0  # how far above the room noise counts as speech
+MIC_PREROLL_SEC = 0.5  # each recording starts this far in the past (catches the first word)
+MIC_BUFFER_SEC = 30.0  # audio kept by the always-open microphone stream
+STT_SAMPLE_RATE = 16000  # speech needs no more; ~2.8x smaller than 44.1 kHz
+STT_UPLOAD_FORMAT = "flac"  # "flac" (lossless, roughly half the size of WAV; needs soundfile) or "wav"
 
 import os
 from dotenv import load_dotenv
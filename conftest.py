@@ -0,0 +1,34 @@
+"""
+Shared pytest setup: the audio tests run headless on SDL's dummy driver.
+
+test_speech_tools.py and TTS_test.py are manual scripts for real
+microphone/speaker hardware and the ElevenLabs API, so pytest does not
+collect them.
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+collect_ignore = ["test_speech_tools.py", "TTS_test.py"]
+
+
+@pytest.fixture(scope="session")
+def mixer():
+    import pygame
+    pygame.mixer.init(44100, -16, 2)
+    yield pygame.mixer
+    pygame.mixer.quit()
+
+
+@pytest.fixture
+def silence(mixer):
+    """Makes silent Sounds of a given length; stops all channels afterwards."""
+    import numpy as np
+
+    def make(seconds):
+        return mixer.Sound(buffer=np.zeros(int(44100 * seconds) * 2, dtype=np.int16).tobytes())
+
+    yield make
+    mixer.stop()
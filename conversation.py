@@ -0,0 +1,94 @@
+"""
+Bounded conversation context for the support agent.
+
+Instead of one agent session that grows with every turn (and makes every
+LLM call slower and pricier than the last), each turn is sent to a fresh
+session with a message built here:
+
+    [Session: ...]   game stats from game_logger.session_stats()
+    [Earlier: ...]   older turns folded into a compact summary
+    [Recent]         the last keep_turns exchanges, verbatim
+    [Event: ...]     the current event and what the player said
+
+Folding is local and deterministic (turn count, the player's moods as
+classified by intent_router, a few short quotes), so the message size stays
+flat however long the participant plays.
+"""
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+
+from intent_router import route, SILENCE, STOP
+
+MAX_TURN_CHARS = 200  # each remembered line is cut to this length
+QUOTE_CHARS = 40
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class ConversationContext:
+    def __init__(self, keep_turns: int = 4, max_quotes: int = 3):
+        self.keep_turns = keep_turns
+        self.turns = deque()  # [player_text, coach_text], oldest first
+        self.folded = 0  # turns summarized away so far
+        self.moods = Counter()  # intent_router intent (or "other") of folded player lines
+        self.quotes = deque(maxlen=max_quotes)  # latest folded player lines, shortened
+
+    def add_user(self, text: str) -> None:
+        """Starts a new exchange with what the player said."""
+        self.turns.append([_clip(text, MAX_TURN_CHARS), ""])
+        while len(self.turns) > self.keep_turns:
+            self._fold(self.turns.popleft())
+
+    def add_agent(self, text: str) -> None:
+        """Adds (part of) the coach's answer to the latest exchange."""
+        if not self.turns:
+            return
+        turn = self.turns[-1]
+        turn[1] = _clip(f"{turn[1]} {text}" if turn[1] else text, MAX_TURN_CHARS)
+
+    def _fold(self, turn) -> None:
+        player_text = turn[0]
+        intent = route(player_text)
+        if intent in (SILENCE, STOP):
+            intent = None
+        self.moods[intent or "other"] += 1
+        self.quotes.append(_clip(player_text, QUOTE_CHARS))
+        self.folded += 1
+
+    def summary(self) -> Optional[str]:
+        """One line covering every folded turn, or None if nothing was folded yet."""
+        if not self.folded:
+            return None
+        moods = ", ".join(f"{mood} x{count}" for mood, count in self.moods.most_common())
+        quotes = ", ".join(f'"{quote}"' for quote in self.quotes)
+        return f"{self.folded} earlier exchanges; player mood: {moods}; recent earlier lines: {quotes}"
+
+    def build_message(self, event: str, stats: Optional[Dict[str, Any]] = None) -> str:
+        """
+        The full agent input for this turn. event is the usual
+        '[Event: ..., Score: ...] User said: "..."' line; the player's line
+        must already have been added with add_user().
+        """
+        lines = []
+        if stats:
+            recent = "/".join(str(score) for score in stats["recent_scores"]) or "-"
+            causes = ", ".join(f"{cause} {count}" for cause, count in stats["death_causes"].items()) or "-"
+            lines.append(f"[Session: {stats['games']} games, best {stats['best_score']}, "
+                         f"last scores {recent}, deaths: {causes}]")
+        summary = self.summary()
+        if summary:
+            lines.append(f"[Earlier: {summary}]")
+
+        # The current exchange is the event line itself
+        history = list(self.turns)[:-1]
+        if history:
+            lines.append("[Recent]")
+            for player_text, coach_text in history:
+                lines.append(f'Player: "{player_text}"')
+                if coach_text:
+                    lines.append(f'Coach: "{coach_text}"')
+        lines.append(event)
+        return "\n".join(lines)
@@ -1,11 +1,16 @@
-import pygame, random, time
+import os
+import random
+import time
+
+import pygame
 from pygame.locals import *
 
-from game_logger import init_session, start_game, finish_game, save_session
+from game_logger import init_session, session_log_path, start_game, finish_game, log_game
 
-from agent_audio_manager import update_agent_audio
+from agent_audio_manager import update_agent_audio, prefetch_agent_audio
 from agent_audio_manager import (
     init_agent_sounds,
+    seed_agent_audio,
     play_intro,
     play_outro,
     play_pipe_loss,
@@ -14,39 +19,48 @@ from agent_audio_manager import (
     play_game_win,
 )
 
-# --- Game constants ---
-SCREEN_WIDHT = 400
-SCREEN_HEIGHT = 600
-SPEED = 10
-GRAVITY = 0.5
-GAME_SPEED = 5
-
-GROUND_WIDHT = 2 * SCREEN_WIDHT
-GROUND_HEIGHT = 100
-
-PIPE_WIDHT = 80
-PIPE_HEIGHT = 500
-PIPE_GAP = 150
+from sprite_assets import get_image, get_number
+from replay import InputRecorder, REPLAY_DIR
+from telemetry import TelemetryRing, TELEMETRY_DIR
+from game_core import (
+    FlappyCore,
+    SCREEN_WIDHT,
+    SCREEN_HEIGHT,
+    SPEED,
+    GRAVITY,
+    GAME_SPEED,
+    GROUND_WIDHT,
+    GROUND_HEIGHT,
+    PIPE_WIDHT,
+    PIPE_HEIGHT,
+    PIPE_GAP,
+)
 
 wing = 'assets/audio/wing.wav'
 hit = 'assets/audio/hit.wav'
 
 
 # --- Sprite Classes ---
-class Bird(pygame.sprite.Sprite):
+# Sprites only draw; positions come from FlappyCore every frame.
+# They are DirtySprites with dirty=2 (they move every frame) so the
+# dirty-rect renderer can use them as well as plain Groups.
+class Bird(pygame.sprite.DirtySprite):
     def __init__(self):
-        pygame.sprite.Sprite.__init__(self)
-        self.images = [pygame.image.load('assets/sprites/bluebird-upflap.png').convert_alpha(),
-                       pygame.image.load('assets/sprites/bluebird-midflap.png').convert_alpha(),
-                       pygame.image.load('assets/sprites/bluebird-downflap.png').convert_alpha()]
-        self.speed = SPEED
-        self.current_image = 0
-        self.image = pygame.image.load('assets/sprites/bluebird-upflap.png').convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        pygame.sprite.DirtySprite.__init__(self)
+        self.dirty = 2
+        self.images = [get_image('bluebird-upflap.png'),
+                       get_image('bluebird-midflap.png'),
+                       get_image('bluebird-downflap.png')]
         self.animation_time = 120
-        self.last_anim_time = pygame.time.get_ticks()
-        self.rect = self.image.get_rect()
+        self.rect = self.images[0].get_rect()
         self.rect[0] = SCREEN_WIDHT / 6
+        self.reset()
+
+    def reset(self):
+        """Back to the start position, so one Bird serves every round."""
+        self.current_image = 0
+        self.image = self.images[0]
+        self.last_anim_time = pygame.time.get_ticks()
         self.rect[1] = SCREEN_HEIGHT / 2
 
     def update(self):
@@ -55,66 +69,76 @@ class Bird(pygame.sprite.Sprite):
             self.current_image = (self.current_image + 1) % 3
             self.image = self.images[self.current_image]
             self.last_anim_time = now
-        self.speed += GRAVITY
-        self.rect[1] += self.speed
 
-    def bump(self):
-        self.speed = -SPEED
 
-    def begin(self):
-        now = pygame.time.get_ticks()
-        if now - self.last_anim_time >= self.animation_time:
-            self.current_image = (self.current_image + 1) % 3
-            self.image = self.images[self.current_image]
-            self.last_anim_time = now
-
-
-class Pipe(pygame.sprite.Sprite):
+class Pipe(pygame.sprite.DirtySprite):
     def __init__(self, inverted, xpos, ysize):
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.image.load('assets/sprites/pipe-green.png').convert_alpha()
-        self.image = pygame.transform.scale(self.image, (PIPE_WIDHT, PIPE_HEIGHT))
+        pygame.sprite.DirtySprite.__init__(self)
+        self.dirty = 2
+        self.inverted = inverted
+        self.image = get_image('pipe-green.png', (PIPE_WIDHT, PIPE_HEIGHT), flip_y=inverted)
         self.rect = self.image.get_rect()
+        self.place(xpos, ysize)
+
+    def place(self, xpos, ysize):
+        """Moves a pooled pipe to a new spot; only the gap height changes."""
         self.rect[0] = xpos
-        if inverted:
-            self.image = pygame.transform.flip(self.image, False, True)
+        if self.inverted:
             self.rect[1] = - (self.rect[3] - ysize)
         else:
             self.rect[1] = SCREEN_HEIGHT - ysize
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def update(self):
-        self.rect[0] -= GAME_SPEED
 
 
-class Ground(pygame.sprite.Sprite):
+class Ground(pygame.sprite.DirtySprite):
     def __init__(self, xpos):
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.image.load('assets/sprites/base.png').convert_alpha()
-        self.image = pygame.transform.scale(self.image, (GROUND_WIDHT, GROUND_HEIGHT))
-        self.mask = pygame.mask.from_surface(self.image)
+        pygame.sprite.DirtySprite.__init__(self)
+        self.dirty = 2
+        self.image = get_image('base.png', (GROUND_WIDHT, GROUND_HEIGHT))
         self.rect = self.image.get_rect()
-        self.rect[0] = xpos
         self.rect[1] = SCREEN_HEIGHT - GROUND_HEIGHT
+        self.place(xpos)
 
-    def update(self):
-        self.rect[0] -= GAME_SPEED
+    def place(self, xpos):
+        self.rect[0] = xpos
 
 
-def is_off_screen(sprite):
-    return sprite.rect[0] < -(sprite.rect[2])
+class Overlay(pygame.sprite.DirtySprite):
+    """Static UI image for the dirty-rect renderer; only redrawn when it changes."""
 
+    def __init__(self, image, pos):
+        pygame.sprite.DirtySprite.__init__(self)
+        self.image = image
+        self.rect = image.get_rect(topleft=pos)
+        self.visible = 0
 
-def get_random_pipes(xpos):
-    size = random.randint(100, 300)
-    pipe = Pipe(False, xpos, size)
-    pipe_inverted = Pipe(True, xpos, SCREEN_HEIGHT - size - PIPE_GAP)
+    def show(self, visible):
+        visible = 1 if visible else 0
+        if self.visible != visible:
+            self.visible = visible  # the DirtySprite setter marks it dirty
+
+    def set_image(self, image):
+        if image is not self.image:
+            self.image = image
+            self.rect.size = image.get_size()
+            self.dirty = 1
+
+
+def get_pipe_sprites(pair):
+    """Builds the bottom and top sprites for a core PipePair."""
+    pipe = Pipe(False, pair.x, pair.size)
+    pipe_inverted = Pipe(True, pair.x, SCREEN_HEIGHT - pair.size - PIPE_GAP)
     return pipe, pipe_inverted
 
 
+def place_pipe_sprites(pipe, pipe_inverted, pair):
+    """Reuses an existing bottom/top sprite pair for a core PipePair."""
+    pipe.place(pair.x, pair.size)
+    pipe_inverted.place(pair.x, SCREEN_HEIGHT - pair.size - PIPE_GAP)
+
+
 # --- The Game Engine Class ---
 class FlappyGame:
-    def __init__(self):
+    def __init__(self, dirty_rendering=False, seed=None):
         # Pygame initialization
         pygame.init()
         pygame.font.init()
@@ -132,76 +156,182 @@ class FlappyGame:
         self.info_1 = self.info_font.render("Press 'R' to try again", True, (250, 121, 88))
         self.info_1_bg = self.info_font.render("Press 'R' to try again", True, (240, 234, 161))
 
-        self.BACKGROUND = pygame.image.load('assets/sprites/background-day.png')
-        self.BACKGROUND = pygame.transform.scale(self.BACKGROUND, (SCREEN_WIDHT, SCREEN_HEIGHT))
-        self.BEGIN_IMAGE = pygame.image.load('assets/sprites/message.png').convert_alpha()
-        self.GAME_OVER_TEXT = pygame.image.load('assets/sprites/gameover.png').convert_alpha()
-        self.SCORE_PANEL = pygame.image.load('assets/sprites/score.png').convert_alpha()
-        self.AGENT_WINDOW = pygame.image.load('assets/sprites/agent.png').convert_alpha()
+        self.BACKGROUND = get_image('background-day.png', (SCREEN_WIDHT, SCREEN_HEIGHT), alpha=False)
+        self.BEGIN_IMAGE = get_image('message.png')
+        self.GAME_OVER_TEXT = get_image('gameover.png')
+        self.SCORE_PANEL = get_image('score.png')
+        self.AGENT_WINDOW = get_image('agent.png')
 
         # load the agent with the mouth open
-        self.AGENT_SPEAK = pygame.image.load('assets/sprites/agent_speaking.png').convert_alpha()
+        self.AGENT_SPEAK = get_image('agent_speaking.png')
 
         self.clock = pygame.time.Clock()
 
+        # Every round gets its own seed, drawn from one session-level RNG
+        # (pass seed= to make the whole session reproducible)
+        self.seed_rng = random.Random(seed)
+        seed_agent_audio(self.seed_rng.getrandbits(64))
+
+        # Simulation (physics, score, collisions) lives in the headless core
+        self.core = FlappyCore()
+        self.core.reset(self.seed_rng.getrandbits(64))
+
         # Persistent Game Variables
-        self.high_score = 0
-        self.loss_count = 0
-        self.ticks_played = 0
         self.agent_enabled = False
         self.agent_speaking = False
+        self.on_death = None  # callback(death_context) fired on the collision frame
 
         # Logging
-        self.session_log, self.LOG_PATH = init_session("session_log.txt")
+        self.session_id = time.strftime("%Y%m%d-%H%M%S")
+        self.session_log, self.LOG_PATH = init_session(session_log_path(self.session_id))
         self.current_game_key = None
         self.game_ticks_start = 0
+        self.recorder = None
+        self.telemetry = TelemetryRing()
+        self.frame_ms = 0
+
+        # Initialize First Round (the core starts out freshly reset)
+        self._build_sprites()
+
+        # Dirty-rect mode: only the regions that changed are pushed to the display
+        self.dirty_rendering = dirty_rendering
+        if self.dirty_rendering:
+            self._build_dirty_layers()
+
+    def _build_dirty_layers(self):
+        """One LayeredDirty holding every sprite and UI image, in the classic draw order."""
+        self.layers = pygame.sprite.LayeredDirty()
+        self.layers.clear(self.screen, self.BACKGROUND)
+
+        self.begin_overlay = Overlay(self.BEGIN_IMAGE, (120, 150))
+        self.agent_overlay = Overlay(self.AGENT_WINDOW, (10, 510))
+        self.game_over_overlay = Overlay(self.GAME_OVER_TEXT, (100, 100))
+        self.score_panel_overlay = Overlay(self.SCORE_PANEL, (35, 200))
+
+        info = pygame.Surface((self.info_1_bg.get_width() + 2, self.info_1_bg.get_height() + 2), pygame.SRCALPHA)
+        info.blit(self.info_1_bg, (2, 2))
+        info.blit(self.info_1, (0, 0))
+        self.info_overlay = Overlay(info.convert_alpha(), (50, 220))
+
+        self.score_overlay = Overlay(get_number(0), (310, 245))
+        self.hs_overlay = Overlay(get_number(0), (310, 308))
+
+        self.layers.add(self.begin_overlay, layer=0)
+        self.layers.add(self.bird, layer=1)
+        self.layers.add(self.pipe_group.sprites(), layer=2)
+        self.layers.add(self.ground_group.sprites(), layer=3)
+        self.layers.add(self.agent_overlay, layer=4)
+        self.layers.add(self.game_over_overlay, self.score_panel_overlay, layer=5)
+        self.layers.add(self.score_overlay, self.hs_overlay, self.info_overlay, layer=6)
+
+        # The first frame has to cover the whole window
+        self.screen.blit(self.BACKGROUND, (0, 0))
+        pygame.display.flip()
 
-        # Initialize First Round
-        self.init_round()
+    def _draw_dirty(self):
+        """Updates overlay visibility and pushes only the changed rects."""
+        game_over = not self.alive
+        talking = getattr(self, 'is_talking', False)
+
+        self.begin_overlay.show(self.begin)
+        for pipe in self.pipe_group:
+            pipe.visible = 0 if self.begin else 1
+
+        self.agent_overlay.show(self.agent_enabled)
+        if not self.begin and talking and (pygame.time.get_ticks() // 150) % 2 == 0:
+            self.agent_overlay.set_image(self.AGENT_SPEAK)
+        else:
+            self.agent_overlay.set_image(self.AGENT_WINDOW)
+
+        for overlay in (self.game_over_overlay, self.score_panel_overlay,
+                        self.score_overlay, self.hs_overlay, self.info_overlay):
+            overlay.show(game_over)
+
+        pygame.display.update(self.layers.draw(self.screen))
+
+    # --- Core state, read through the renderer ---
+    @property
+    def high_score(self):
+        return self.core.high_score
+
+    @property
+    def loss_count(self):
+        return self.core.loss_count
+
+    @property
+    def ticks_played(self):
+        return self.core.ticks_played
+
+    @property
+    def begin(self):
+        return self.core.begin
+
+    @property
+    def alive(self):
+        return self.core.alive
+
+    @property
+    def passed(self):
+        return self.core.passed
+
+    @property
+    def score(self):
+        return self.core.score
 
     def init_round(self):
-        """Initializes sprites for a new game round."""
+        """Resets the core and puts the pooled sprites back for a new game round."""
+        self.core.reset(self.seed_rng.getrandbits(64))
+
+        self.bird.reset()
+        for ground, xpos in zip(self.ground_group.sprites(), self.core.grounds):
+            ground.place(xpos)
+        pipe_sprites = self.pipe_group.sprites()
+        for i, pair in enumerate(self.core.pipes):
+            place_pipe_sprites(pipe_sprites[2 * i], pipe_sprites[2 * i + 1], pair)
+
+    def _build_sprites(self):
+        """Creates the only sprites the game will ever use; later rounds recycle them."""
         self.bird_group = pygame.sprite.Group()
         self.bird = Bird()
         self.bird_group.add(self.bird)
 
         self.ground_group = pygame.sprite.Group()
-        for i in range(2):
-            ground = Ground(GROUND_WIDHT * i)
+        for xpos in self.core.grounds:
+            ground = Ground(xpos)
             self.ground_group.add(ground)
 
         self.pipe_group = pygame.sprite.Group()
-        for i in range(2):
-            pipes = get_random_pipes(SCREEN_WIDHT * i + 800)
+        for pair in self.core.pipes:
+            pipes = get_pipe_sprites(pair)
             self.pipe_group.add(pipes[0])
             self.pipe_group.add(pipes[1])
 
-        self.begin = True
-        self.alive = True
-        self.passed = False
-        self.score = 0
+    def _sync_sprites(self, events):
+        """Mirrors the core positions onto the sprites after a step."""
+        # Recycled sprites move to the back of their group so the group
+        # order keeps matching the core lists (and the old draw order).
+        if events["ground_spawned"]:
+            ground = self.ground_group.sprites()[0]
+            self.ground_group.remove(ground)
+            self.ground_group.add(ground)
+
+        if events["pipes_spawned"]:
+            pipes = self.pipe_group.sprites()[:2]
+            self.pipe_group.remove(pipes)
+            place_pipe_sprites(pipes[0], pipes[1], self.core.pipes[-1])
+            self.pipe_group.add(pipes)
+
+        self.bird.rect[1] = self.core.bird_y
+        for ground, xpos in zip(self.ground_group.sprites(), self.core.grounds):
+            ground.place(xpos)
+        pipe_sprites = self.pipe_group.sprites()
+        for i, pair in enumerate(self.core.pipes):
+            pipe_sprites[2 * i].rect[0] = pair.x
+            pipe_sprites[2 * i + 1].rect[0] = pair.x
 
     def get_state(self):
         """Returns the game state for the support agent."""
-        # Find next pipe distance
-        dist_to_pipe = 9999
-        pipe_y = 0
-        for pipe in self.pipe_group:
-            if pipe.rect[1] > 0:  # Bottom pipe
-                if pipe.rect.x + pipe.rect.width > self.bird.rect.x:
-                    if pipe.rect.x < dist_to_pipe:
-                        dist_to_pipe = pipe.rect.x
-                        pipe_y = pipe.rect.y
-
-        return {
-            "player_y": self.bird.rect.y,
-            "next_pipe_dist_x": dist_to_pipe - self.bird.rect.x,
-            "next_pipe_y": pipe_y,
-            "is_alive": self.alive,
-            "game_active": not self.begin,
-            "score": self.score,
-            "loss_count": self.loss_count
-        }
+        return self.core.get_state()
 
     def frame_step(self, input_action=None):
         """
@@ -209,7 +339,7 @@ class FlappyGame:
         If input_action is None, it listens to the keyboard.
         """
         update_agent_audio()
-        self.clock.tick(60)
+        self.frame_ms = self.clock.tick(60)
 
         # 1. Event Handling (Manual Input)
         for event in pygame.event.get():
@@ -224,29 +354,28 @@ class FlappyGame:
 
         # 2. Start Screen Logic
         if self.begin:
-            if input_action == "jump":
-                self.bird.bump()
+            events = self.core.step(input_action)
+            self._sync_sprites(events)
+
+            if events["started"]:
                 pygame.mixer.music.load(wing)
                 pygame.mixer.music.play()
 
-                self.current_game_key = start_game(self.session_log, self.high_score, self.loss_count)
+                self.current_game_key = start_game(self.session_log, self.high_score, self.loss_count,
+                                                   seed=self.core.seed,
+                                                   agent_enabled=self.agent_enabled)
                 self.game_ticks_start = self.ticks_played
+                self.recorder = InputRecorder(self.core.seed)
+                self.telemetry.reset()
+
+            self.bird.update()
 
-                self.begin = False
-                self.passed = False
-                self.score = 0
+            if self.dirty_rendering:
+                self._draw_dirty()
+                return True
 
             self.screen.blit(self.BACKGROUND, (0, 0))
             self.screen.blit(self.BEGIN_IMAGE, (120, 150))
-
-            if is_off_screen(self.ground_group.sprites()[0]):
-                self.ground_group.remove(self.ground_group.sprites()[0])
-                new_ground = Ground(GROUND_WIDHT - 20)
-                self.ground_group.add(new_ground)
-
-            self.bird.begin()
-            self.ground_group.update()
-
             self.bird_group.draw(self.screen)
             self.ground_group.draw(self.screen)
             if self.agent_enabled: self.screen.blit(self.AGENT_WINDOW, (10, 510))
@@ -254,71 +383,67 @@ class FlappyGame:
             return True
 
         # 3. Main Logic
-        self.screen.blit(self.BACKGROUND, (0, 0))
-
         # --- UPDATE PHASE (Physics) ---
         if self.alive:
-            self.ticks_played += 1
-            if input_action == "jump":
-                self.bird.bump()
+            events = self.core.step(input_action)
+            self._sync_sprites(events)
+            self.bird.update()
+            if self.recorder is not None:
+                self.recorder.record(events["flapped"])
+            state = self.core.get_state()
+            self.telemetry.record(state, self.core.bird_speed, events["flapped"], self.frame_ms)
+            if self.agent_enabled and state["is_alive"]:
+                prefetch_agent_audio(state, self.high_score)
+
+            if events["flapped"]:
                 pygame.mixer.music.load(wing)
                 pygame.mixer.music.play()
 
-            if is_off_screen(self.ground_group.sprites()[0]):
-                self.ground_group.remove(self.ground_group.sprites()[0])
-                new_ground = Ground(GROUND_WIDHT - 20)
-                self.ground_group.add(new_ground)
-
-            bird_pos = SCREEN_WIDHT / 6
-            current_pipe = self.pipe_group.sprites()[0]
-            if (self.passed is False) and (current_pipe.rect[0] <= bird_pos):
-                self.passed = True
-                self.score += 1
+            if events["scored"]:
                 print(" Score: " + str(self.score))
 
-            if is_off_screen(self.pipe_group.sprites()[0]):
-                self.pipe_group.remove(self.pipe_group.sprites()[0])
-                self.pipe_group.remove(self.pipe_group.sprites()[0])
-                pipes = get_random_pipes(SCREEN_WIDHT * 2)
-                self.pipe_group.add(pipes[0])
-                self.pipe_group.add(pipes[1])
-                self.passed = False
-
-            # Update sprite positions
-            self.bird_group.update()
-            self.ground_group.update()
-            self.pipe_group.update()
-
-            # Collision Check
-            hit_ground = pygame.sprite.groupcollide(self.bird_group, self.ground_group, False, False,
-                                                    pygame.sprite.collide_mask)
-            hit_pipe = pygame.sprite.groupcollide(self.bird_group, self.pipe_group, False, False,
-                                                  pygame.sprite.collide_mask)
-
-            if hit_ground or hit_pipe:
-                self.high_score = max(self.high_score, self.score)
+            death_cause = events["death_cause"]
+            if death_cause is not None:
                 if self.high_score == self.score and self.agent_enabled: play_high_score()
-                if hit_pipe and self.agent_enabled: play_pipe_loss()
-                if hit_ground and self.agent_enabled: play_ground_loss()
+                if death_cause == "pipe" and self.agent_enabled: play_pipe_loss()
+                if death_cause == "ground" and self.agent_enabled: play_ground_loss()
                 pygame.mixer.music.load(hit)
                 pygame.mixer.music.play()
-                self.alive = False
-                self.loss_count += 1
 
                 if self.current_game_key is not None:
                     duration_ticks = self.ticks_played - self.game_ticks_start
-                    death_cause = "ground" if hit_ground else "pipe"
+                    file_stem = f"{self.session_id}_game_{self.current_game_key:04d}"
+                    replay_path = self.recorder.save(os.path.join(REPLAY_DIR, file_stem + ".flr"))
+                    self.recorder = None
+                    telemetry_path = self.telemetry.flush(os.path.join(TELEMETRY_DIR, file_stem + ".npz"),
+                                                          seed=self.core.seed, score=self.score,
+                                                          death_cause=death_cause)
                     finish_game(self.session_log, self.current_game_key, duration_ticks, self.score, self.high_score,
-                                self.loss_count, death_cause)
-                    save_session(self.LOG_PATH, self.session_log)
+                                self.loss_count, death_cause, replay_path=replay_path,
+                                telemetry_path=telemetry_path)
+                    log_game(self.LOG_PATH, self.session_log, self.current_game_key)
+
+                if self.on_death is not None:
+                    self.on_death(self.get_death_context(death_cause))
 
                 # Prepare surfaces for Game Over screen
-                self.score_surface = self.score_font.render(str(self.score), True, (250, 121, 88))
-                self.score_bg_surface = self.score_bg_font.render(str(self.score), True, (240, 234, 161))
-                self.hs_surface = self.score_font.render(str(self.high_score), True, (250, 121, 88))
-                self.hs_bg_surface = self.score_bg_font.render(str(self.high_score), True, (240, 234, 161))
+                if self.dirty_rendering:
+                    self.score_overlay.set_image(get_number(self.score))
+                    self.hs_overlay.set_image(get_number(self.high_score))
+                else:
+                    self.score_surface = self.score_font.render(str(self.score), True, (250, 121, 88))
+                    self.score_bg_surface = self.score_bg_font.render(str(self.score), True, (240, 234, 161))
+                    self.hs_surface = self.score_font.render(str(self.high_score), True, (250, 121, 88))
+                    self.hs_bg_surface = self.score_bg_font.render(str(self.high_score), True, (240, 234, 161))
+
+        if self.dirty_rendering:
+            if not self.alive:
+                self._game_over_logic(input_action)
+            self._draw_dirty()
+            return True
 
         # --- DRAW PHASE ---
+        self.screen.blit(self.BACKGROUND, (0, 0))
         self.bird_group.draw(self.screen)
         self.pipe_group.draw(self.screen)
         self.ground_group.draw(self.screen)
@@ -337,8 +462,7 @@ class FlappyGame:
 
         # --- GAME OVER UI ---
         if not self.alive:
-            if not self.agent_speaking and input_action == "restart":
-                self.init_round()
+            self._game_over_logic(input_action)
 
             self.screen.blit(self.GAME_OVER_TEXT, (100, 100))
             self.screen.blit(self.SCORE_PANEL, (35, 200))
@@ -349,15 +473,32 @@ class FlappyGame:
             self.screen.blit(self.info_1_bg, (52, 222))
             self.screen.blit(self.info_1, (50, 220))
 
-            # Enable Agent if conditions met
-            if not self.agent_enabled and self.loss_count >= 5 and self.ticks_played >= 600:
-                self.agent_enabled = True
-                print("This is where the agent should first intervene")
-                play_intro()
-
         pygame.display.update()
         return True
 
+    def get_death_context(self, death_cause, history=5):
+        """What the agent needs to react to a death: cause, scores, near-misses and the last few games."""
+        recent = [g["final_score"] for g in self.session_log.values() if g["final_score"] is not None]
+        return {
+            "death_cause": death_cause,
+            "score": self.score,
+            "high_score": self.high_score,
+            "loss_count": self.loss_count,
+            "recent_scores": recent[-history:],
+            "min_clearance": self.telemetry.min_clearance(),
+        }
+
+    def _game_over_logic(self, input_action):
+        """Restart on request, and switch the agent on once the thresholds are met."""
+        if not self.agent_speaking and input_action == "restart":
+            self.init_round()
+
+        # Enable Agent if conditions met
+        if not self.agent_enabled and self.loss_count >= 5 and self.ticks_played >= 600:
+            self.agent_enabled = True
+            print("This is where the agent should first intervene")
+            play_intro()
+
 
 if __name__ == "__main__":
     game = FlappyGame()
@@ -0,0 +1,129 @@
+"""
+Gym-style environment over FlappyCore, plus a process-pool rollout runner.
+
+    env = FlappyEnv(seed=3)
+    obs, info = env.reset()
+    while True:
+        obs, reward, terminated, truncated, info = env.step(policy(obs))
+        if terminated or truncated:
+            break
+
+run_parallel() fans whole episodes out over a multiprocessing pool. Every
+episode gets its own seed (base seed + episode index), so results do not
+depend on how many workers there are or which worker ran what.
+Policies must be module-level functions so they can be pickled.
+"""
+import multiprocessing
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from game_core import FlappyCore
+
+Policy = Callable[[Dict[str, Any]], Any]
+
+
+class FlappyEnv:
+    """
+    reset()/step(action) wrapper around the headless core.
+    action is truthy for a flap (1, True or "jump"); reward is +1 per pipe passed.
+    """
+
+    def __init__(self, seed: Optional[int] = None, max_ticks: int = 100_000):
+        self.max_ticks = max_ticks
+        self.core = FlappyCore(rng=random.Random(seed))
+        self.round_ticks = 0
+
+    def _observe(self) -> Dict[str, Any]:
+        obs = self.core.get_state()
+        obs["velocity"] = self.core.bird_speed
+        return obs
+
+    def _info(self) -> Dict[str, Any]:
+        return {
+            "score": self.core.score,
+            "duration_ticks": self.round_ticks,
+            "death_cause": self.core.death_cause,
+        }
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Starts a new round, already past the start screen."""
+        self.core.reset(seed)
+        self.core.step("jump")
+        self.round_ticks = 0
+        return self._observe(), self._info()
+
+    def step(self, action) -> Tuple[Dict[str, Any], int, bool, bool, Dict[str, Any]]:
+        jump = action == "jump" if isinstance(action, str) else bool(action)
+        events = self.core.step("jump" if jump else None)
+        self.round_ticks += 1
+
+        reward = 1 if events["scored"] else 0
+        terminated = not self.core.alive
+        truncated = not terminated and self.round_ticks >= self.max_ticks
+        return self._observe(), reward, terminated, truncated, self._info()
+
+
+def run_episode(policy: Policy, seed: int, max_ticks: int = 100_000) -> Dict[str, Any]:
+    """Plays one seeded episode to the end and returns its summary."""
+    env = FlappyEnv(max_ticks=max_ticks)
+    obs, info = env.reset(seed=seed)
+    terminated = truncated = False
+    while not (terminated or truncated):
+        obs, _, terminated, truncated, info = env.step(policy(obs))
+
+    info["seed"] = seed
+    if truncated:
+        info["death_cause"] = "timeout"
+    return info
+
+
+def _run_chunk(args) -> List[Dict[str, Any]]:
+    policy, seeds, max_ticks = args
+    return [run_episode(policy, seed, max_ticks) for seed in seeds]
+
+
+def run_parallel(policy: Policy, episodes: int, seed: int = 0,
+                 workers: Optional[int] = None, max_ticks: int = 100_000,
+                 chunk_size: int = 64) -> List[Dict[str, Any]]:
+    """
+    Runs `episodes` games across a process pool (one worker per core by default).
+    Episodes are shipped in chunks to keep pickling overhead low.
+    Returns the per-episode summaries ordered by seed.
+    """
+    seeds = [seed + i for i in range(episodes)]
+    chunks = [(policy, seeds[i:i + chunk_size], max_ticks) for i in range(0, episodes, chunk_size)]
+
+    with multiprocessing.Pool(processes=workers) as pool:
+        results = [info for chunk in pool.imap_unordered(_run_chunk, chunks) for info in chunk]
+
+    results.sort(key=lambda info: info["seed"])
+    return results
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Mean/max score, mean duration and death-cause counts for a batch of episodes."""
+    scores = [r["score"] for r in results]
+    causes: Dict[str, int] = {}
+    for r in results:
+        causes[r["death_cause"]] = causes.get(r["death_cause"], 0) + 1
+    return {
+        "episodes": len(results),
+        "mean_score": sum(scores) / len(scores) if scores else 0.0,
+        "max_score": max(scores, default=0),
+        "mean_duration_ticks": sum(r["duration_ticks"] for r in results) / len(results) if results else 0.0,
+        "death_causes": causes,
+    }
+
+
+def gap_follower(obs) -> bool:
+    """Baseline bot with a shaky thumb: flap while falling below the middle of the next gap."""
+    return obs["velocity"] > 0 and obs["player_y"] > obs["next_pipe_y"] - 50 + random.randint(-40, 40)
+
+
+if __name__ == "__main__":
+    for workers in (1, multiprocessing.cpu_count()):
+        start = time.perf_counter()
+        results = run_parallel(gap_follower, episodes=2000, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers} worker(s): {elapsed:.2f}s -> {summarize(results)}")
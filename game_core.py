@@ -0,0 +1,262 @@
+"""
+Headless simulation core for Flappy Bird.
+
+Holds everything that decides the outcome of a run (bird physics, pipes,
+ground scrolling, score, collisions and death cause) without touching the
+display, the mixer or the frame clock. FlappyGame in flap.py is a renderer
+on top of this; soak tests and bot evaluations can step it directly:
+
+    core = FlappyCore()
+    core.step("jump")
+    while core.alive:
+        core.step(None)
+
+Collisions use the same pixel masks as the sprites, so a headless run ends
+on exactly the frame the windowed game would.
+"""
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pygame
+
+from sprite_assets import get_mask
+
+# --- Game constants ---
+SCREEN_WIDHT = 400
+SCREEN_HEIGHT = 600
+SPEED = 10
+GRAVITY = 0.5
+GAME_SPEED = 5
+
+GROUND_WIDHT = 2 * SCREEN_WIDHT
+GROUND_HEIGHT = 100
+
+PIPE_WIDHT = 80
+PIPE_HEIGHT = 500
+PIPE_GAP = 150
+
+BIRD_X = SCREEN_WIDHT / 6
+
+
+# --- Collision masks (decoded once, no display needed) ---
+def collision_masks() -> Dict[str, "pygame.mask.Mask"]:
+    """The bird, pipe and ground masks, shared with the sprites via sprite_assets."""
+    return {
+        "bird": get_mask("bluebird-upflap.png"),
+        "pipe": get_mask("pipe-green.png", (PIPE_WIDHT, PIPE_HEIGHT)),
+        "pipe_inverted": get_mask("pipe-green.png", (PIPE_WIDHT, PIPE_HEIGHT), flip_y=True),
+        "ground": get_mask("base.png", (GROUND_WIDHT, GROUND_HEIGHT)),
+    }
+
+
+def mask_row_spans(mask) -> List[Tuple[int, int]]:
+    """
+    Per-row (first, last) set column of a mask, or (0, -1) for an empty row.
+    Used by the vectorized simulators in place of pixel overlap tests.
+    """
+    width, height = mask.get_size()
+    spans = []
+    for y in range(height):
+        cols = [x for x in range(width) if mask.get_at((x, y))]
+        spans.append((cols[0], cols[-1]) if cols else (0, -1))
+    return spans
+
+
+class PipePair:
+    """One bottom/top pipe pair sharing an x position."""
+
+    def __init__(self, xpos, size):
+        self.x = xpos
+        self.size = size  # height of the bottom pipe above the screen edge
+
+    @property
+    def bottom_y(self):
+        return SCREEN_HEIGHT - self.size
+
+    @property
+    def top_y(self):
+        # Same maths as Pipe(inverted=True, ysize=SCREEN_HEIGHT - size - PIPE_GAP)
+        return -(PIPE_HEIGHT - (SCREEN_HEIGHT - self.size - PIPE_GAP))
+
+
+def random_pipe_size(rng=random):
+    return rng.randint(100, 300)
+
+
+class FlappyCore:
+    """
+    Pure game state. One call to step() is one frame at 60 FPS game time,
+    but nothing here waits for the wall clock.
+    """
+
+    def __init__(self, rng=None):
+        # Anything with randint() works (the random module or random.Random)
+        self.rng = rng if rng is not None else random
+        self.seed = None
+        self._masks = collision_masks()
+
+        # Persistent across rounds
+        self.high_score = 0
+        self.loss_count = 0
+        self.ticks_played = 0
+
+        self.reset()
+
+    def reset(self, seed: Optional[int] = None):
+        """
+        Puts the bird back on the start screen with fresh pipes.
+        With a seed the round gets its own random.Random, so its pipe
+        sequence can be reproduced from the seed alone.
+        """
+        if seed is not None:
+            self.rng = random.Random(seed)
+            self.seed = seed
+        self.bird_x = int(BIRD_X)
+        self.bird_y = SCREEN_HEIGHT // 2
+        self.bird_speed = SPEED
+
+        self.grounds: List[int] = [GROUND_WIDHT * i for i in range(2)]
+        self.pipes: List[PipePair] = [
+            PipePair(SCREEN_WIDHT * i + 800, random_pipe_size(self.rng)) for i in range(2)
+        ]
+
+        self.begin = True
+        self.alive = True
+        self.passed = False
+        self.score = 0
+        self.death_cause = None
+
+    def get_state(self) -> Dict[str, Any]:
+        """Returns the game state for the support agent."""
+        # Find next pipe distance
+        dist_to_pipe = 9999
+        pipe_y = 0
+        for pipe in self.pipes:
+            if pipe.x + PIPE_WIDHT > self.bird_x:
+                if pipe.x < dist_to_pipe:
+                    dist_to_pipe = pipe.x
+                    pipe_y = pipe.bottom_y
+
+        return {
+            "player_y": self.bird_y,
+            "next_pipe_dist_x": dist_to_pipe - self.bird_x,
+            "next_pipe_y": pipe_y,
+            "is_alive": self.alive,
+            "game_active": not self.begin,
+            "score": self.score,
+            "loss_count": self.loss_count
+        }
+
+    def step(self, input_action: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Advances exactly ONE frame and reports what happened in it.
+        input_action is "jump" or None; a dead round stays frozen until reset().
+        """
+        events = {
+            "started": False,
+            "flapped": False,
+            "scored": False,
+            "pipes_spawned": False,
+            "ground_spawned": False,
+            "death_cause": None,
+        }
+
+        # Start screen: only the ground scrolls until the first jump
+        if self.begin:
+            if input_action == "jump":
+                self.bird_speed = -SPEED
+                events["started"] = True
+                events["flapped"] = True
+                self.begin = False
+                self.passed = False
+                self.score = 0
+
+            events["ground_spawned"] = self._scroll_ground()
+            return events
+
+        if not self.alive:
+            return events
+
+        self.ticks_played += 1
+        if input_action == "jump":
+            self.bird_speed = -SPEED
+            events["flapped"] = True
+
+        if (self.passed is False) and (self.pipes[0].x <= BIRD_X):
+            self.passed = True
+            self.score += 1
+            events["scored"] = True
+
+        if self.pipes[0].x < -PIPE_WIDHT:
+            # Recycle the pair object instead of allocating a new one
+            pair = self.pipes.pop(0)
+            pair.x = SCREEN_WIDHT * 2
+            pair.size = random_pipe_size(self.rng)
+            self.pipes.append(pair)
+            self.passed = False
+            events["pipes_spawned"] = True
+
+        # Update positions (ints, like pygame.Rect)
+        self.bird_speed += GRAVITY
+        self.bird_y = int(self.bird_y + self.bird_speed)
+        events["ground_spawned"] = self._scroll_ground()
+        for pipe in self.pipes:
+            pipe.x -= GAME_SPEED
+
+        # Collision check
+        hit_ground, hit_pipe = self._collisions()
+        if hit_ground or hit_pipe:
+            self.high_score = max(self.high_score, self.score)
+            self.alive = False
+            self.loss_count += 1
+            self.death_cause = "ground" if hit_ground else "pipe"
+            events["death_cause"] = self.death_cause
+
+        return events
+
+    def _scroll_ground(self) -> bool:
+        """Recycles the ground segment that left the screen, then scrolls."""
+        spawned = False
+        if self.grounds[0] < -GROUND_WIDHT:
+            self.grounds.pop(0)
+            self.grounds.append(GROUND_WIDHT - 20)
+            spawned = True
+        for i in range(len(self.grounds)):
+            self.grounds[i] -= GAME_SPEED
+        return spawned
+
+    def _collisions(self):
+        masks = self._masks
+        bird = masks["bird"]
+        bx, by = self.bird_x, self.bird_y
+
+        ground_y = SCREEN_HEIGHT - GROUND_HEIGHT
+        hit_ground = any(bird.overlap(masks["ground"], (gx - bx, ground_y - by)) for gx in self.grounds)
+
+        hit_pipe = False
+        for pipe in self.pipes:
+            if bird.overlap(masks["pipe"], (pipe.x - bx, pipe.bottom_y - by)) or \
+                    bird.overlap(masks["pipe_inverted"], (pipe.x - bx, pipe.top_y - by)):
+                hit_pipe = True
+                break
+
+        return hit_ground, hit_pipe
+
+
+if __name__ == "__main__":
+    # Soak run: a simple gap-following bot, no window, no frame cap
+    core = FlappyCore()
+    frames = 0
+    start = time.perf_counter()
+    for _ in range(200):
+        core.reset()
+        core.step("jump")
+        while core.alive and frames < 1_000_000:
+            state = core.get_state()
+            falling = core.bird_speed > 0
+            jump = falling and state["player_y"] > state["next_pipe_y"] - 50 + random.randint(-30, 30)
+            core.step("jump" if jump else None)
+            frames += 1
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames in {elapsed:.2f}s ({frames / elapsed:.0f} FPS), high score {core.high_score}")
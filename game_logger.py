@@ -1,5 +1,4 @@
 # game_logger.py
-from ast import literal_eval
 """
 Game logger.
 
@@ -15,36 +14,149 @@ Internal structure during runtime:
         ...
     }
 
-When saving, we convert this to a flat dict:
-    {
-        1: "ID: 1\nStart: ...\nEnd: ...\nDuration (ticks): ...\nScore: ...\n...",
-        2: "ID: 2\nStart: ...\n...",
-        ...
-    }
+On disk the log is append-only JSON Lines: every finished game is one
+JSON object on its own line. Lines are handed to a background writer
+thread (SessionWriter) that batches them and fsyncs at most once per
+FSYNC_INTERVAL, so logging a death never blocks the game loop and a
+session costs O(games) I/O instead of rewriting the whole file each time.
 
-and write that dict literal to the log file.
+iter_session() streams a log back one game at a time, so huge logs never
+have to fit in memory.
+
+Every session gets its own file, logs/session_<session_id>.jsonl (see
+session_log_path), so participants never overwrite each other's logs;
+session_analytics.py aggregates the whole directory.
 """
 
+from ast import literal_eval
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterator, Optional, Tuple
+import atexit
+import json
+import os
+import queue
+import threading
 import time
 
+FSYNC_INTERVAL = 1.0  # seconds between fsyncs while games keep coming in
+LOG_DIR = "logs"
+LEGACY_LOG_PATH = "session_log.txt"  # single shared log used before per-session files
+
+
+class SessionWriter:
+    """Background thread that appends JSON lines to one log file."""
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._file = open(log_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Queues one record; returns immediately."""
+        self._queue.put(json.dumps(record))
+
+    def close(self) -> None:
+        """Writes everything still queued, fsyncs and stops the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        last_sync = time.monotonic()
+        dirty = False
+        running = True
+        while running:
+            try:
+                line = self._queue.get(timeout=FSYNC_INTERVAL)
+            except queue.Empty:
+                line = ""  # idle: just sync what is pending
+
+            # Drain whatever else is queued into the same batch
+            batch = []
+            while True:
+                if line is None:
+                    running = False
+                elif line:
+                    batch.append(line)
+                try:
+                    line = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._file.write("\n".join(batch) + "\n")
+                self._file.flush()
+                dirty = True
+
+            now = time.monotonic()
+            if dirty and (not running or now - last_sync >= FSYNC_INTERVAL):
+                os.fsync(self._file.fileno())
+                last_sync = now
+                dirty = False
+
+        self._file.close()
+
+
+_writers: Dict[str, SessionWriter] = {}
+
+
+def _writer(log_path: str) -> SessionWriter:
+    writer = _writers.get(log_path)
+    if writer is None:
+        writer = SessionWriter(log_path)
+        _writers[log_path] = writer
+    return writer
+
+
+def close_session(log_path: str) -> None:
+    """Flushes and stops the writer for a log (also done automatically at exit)."""
+    writer = _writers.pop(log_path, None)
+    if writer is not None:
+        writer.close()
+
+
+@atexit.register
+def _close_all_sessions() -> None:
+    for log_path in list(_writers):
+        close_session(log_path)
+
+
+def session_log_path(session_id: str, log_dir: str = LOG_DIR) -> str:
+    """Path of the log file for one session."""
+    return os.path.join(log_dir, f"session_{session_id}.jsonl")
+
+
+def latest_session_path(log_dir: str = LOG_DIR) -> Optional[str]:
+    """The most recently written session log in log_dir, or None."""
+    logs = list(Path(log_dir).glob("session_*.jsonl"))
+    if not logs:
+        return None
+    return str(max(logs, key=lambda p: p.stat().st_mtime))
+
 
 def init_session(log_path: str) -> Tuple[Dict[int, Any], str]:
     """
     Create an empty log file and return (session_log, log_path).
     Call once when a NEW PLAYER starts.
     """
-    path = Path(log_path)
-    path.write_text("{}", encoding="utf-8")
+    close_session(log_path)
+    Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(log_path).write_text("", encoding="utf-8")
+    _writer(log_path)
     return {}, log_path
 
 
 def start_game(session_log: Dict[int, Any],
                high_score_before: int,
-               loss_count_before: int) -> int:
+               loss_count_before: int,
+               seed: Optional[int] = None,
+               agent_enabled: bool = False) -> int:
     """
     Create a new summary entry for a game and return its numeric game_id.
+    seed is the round seed the pipes were generated from (see replay.py);
+    agent_enabled records whether the support agent was on for this game.
     """
     game_id = len(session_log) + 1
 
@@ -59,6 +171,10 @@ def start_game(session_log: Dict[int, Any],
         "loss_count_before": int(loss_count_before),
         "loss_count_after": None,
         "death_cause": None,
+        "seed": seed,
+        "agent_enabled": bool(agent_enabled),
+        "replay_path": None,
+        "telemetry_path": None,
     }
     return game_id
 
@@ -69,7 +185,9 @@ def finish_game(session_log: Dict[int, Any],
                 final_score: int,
                 high_score_after: int,
                 loss_count_after: int,
-                death_cause: str) -> None:
+                death_cause: str,
+                replay_path: Optional[str] = None,
+                telemetry_path: Optional[str] = None) -> None:
     """
     Fill the summary for a game at the end (death).
     """
@@ -80,6 +198,25 @@ def finish_game(session_log: Dict[int, Any],
     g["high_score_after"] = int(high_score_after)
     g["loss_count_after"] = int(loss_count_after)
     g["death_cause"] = str(death_cause)
+    g["replay_path"] = replay_path
+    g["telemetry_path"] = telemetry_path
+
+
+def session_stats(session_log: Dict[int, Any], recent: int = 5) -> Dict[str, Any]:
+    """
+    Compact numbers about the finished games of a session (for the agent's
+    context): games played, best score, the last few scores and death causes.
+    """
+    finished = [g for g in session_log.values() if g.get("final_score") is not None]
+    causes: Dict[str, int] = {}
+    for g in finished:
+        causes[g["death_cause"]] = causes.get(g["death_cause"], 0) + 1
+    return {
+        "games": len(finished),
+        "best_score": max((g["final_score"] for g in finished), default=0),
+        "recent_scores": [g["final_score"] for g in finished[-recent:]],
+        "death_causes": causes,
+    }
 
 
 def _format_game_summary(g: Dict[str, Any]) -> str:
@@ -106,6 +243,9 @@ def _format_game_summary(g: Dict[str, Any]) -> str:
     loss_before = g.get("loss_count_before")
     loss_after = g.get("loss_count_after")
     cause = g.get("death_cause")
+    seed = g.get("seed")
+    agent = g.get("agent_enabled")
+    replay_path = g.get("replay_path")
 
     return (
         f"ID: {g.get('game_id')}\n"
@@ -118,27 +258,62 @@ def _format_game_summary(g: Dict[str, Any]) -> str:
         f"Losses before: {loss_before}\n"
         f"Losses after: {loss_after}\n"
         f"Death cause: {cause}\n"
+        f"Seed: {seed}\n"
+        f"Agent enabled: {agent}\n"
+        f"Replay: {replay_path}\n"
         f"---"
     )
 
 
+def log_game(log_path: str, session_log: Dict[int, Any], game_id: int) -> None:
+    """
+    Append one finished game to the log. Non-blocking: the line is written
+    by the session's background writer thread.
+    """
+    _writer(log_path).append(session_log[game_id])
+
+
 def save_session(log_path: str, session_log: Dict[int, Any]) -> None:
     """
-    Convert the internal nested dict to a flat dict {game_id: summary_string}
-    and write that dict literal to file.
+    Rewrite the whole log from session_log (e.g. to compact or repair it).
+    Games are normally appended one at a time with log_game().
     """
-    flat: Dict[int, str] = {}
+    close_session(log_path)
+    lines = "".join(json.dumps(g) + "\n" for g in session_log.values())
+    Path(log_path).write_text(lines, encoding="utf-8")
 
-    for game_id, g in session_log.items():
-        flat[game_id] = _format_game_summary(g)
 
-    Path(log_path).write_text(repr(flat), encoding="utf-8")
+def iter_session(log_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the games of a log one by one without loading the file.
+    A torn last line (crash mid-write) is skipped.
+    """
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
 
 
-def session_output():
-    with open("session_log.txt", "r", encoding="utf-8") as f:
-        data = literal_eval(f.read())  # turns the dict literal into a real dict
+def session_output(log_path: Optional[str] = None):
+    """Prints every game of a log; defaults to the latest session (or the legacy shared log)."""
+    if log_path is None:
+        log_path = latest_session_path() or LEGACY_LOG_PATH
+    with open(log_path, "r", encoding="utf-8") as f:
+        head = f.read(64)
+
+    # Logs written before the JSON Lines format were one big dict literal
+    if head.startswith("{") and not head.startswith('{"'):
+        with open(log_path, "r", encoding="utf-8") as f:
+            data = literal_eval(f.read())  # turns the dict literal into a real dict
+        summaries = iter(data.values())
+    else:
+        summaries = (_format_game_summary(g) for g in iter_session(log_path))
 
-    for game_id, summary in data.items():
+    for summary in summaries:
         print(summary)  # this will render the \n as real newlines
         print()  # extra blank line between games
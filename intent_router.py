@@ -0,0 +1,54 @@
+"""
+Local intent router for player utterances.
+
+Most of what players say is a variant of "argh", "come on" or "yes!". Those
+are matched here with one compiled regular expression per intent (no
+network, microseconds per call) and answered with the prerecorded clips in
+agent_audio_manager; only novel input is escalated to the LLM.
+
+    intent = route(transcript)
+    if intent is None: ...ask the LLM...
+
+Intents, in priority order:
+    SILENCE      empty/ghost transcripts such as "(wind noise)"; ignored
+    STOP         the player wants to end the session
+    FRUSTRATION  short angry or disappointed reactions
+    CELEBRATION  short happy reactions
+Frustration and celebration only match short utterances that are not a
+question (no "?" and no leading question word, since STT often drops the
+"?"); anything longer might say something the LLM should answer.
+"""
+import re
+from typing import Optional
+
+SILENCE = "silence"
+STOP = "stop"
+FRUSTRATION = "frustration"
+CELEBRATION = "celebration"
+
+ROUTE_MAX_WORDS = 5  # longer utterances always go to the LLM (unless they are a stop request)
+
+_PATTERNS = [
+    (STOP, r"i want to stop|stop now|end the game|i'?m done"),
+    (FRUSTRATION, r"a+r+g+h*|u+g+h+|come on|damn(?:it)?|dammit|stupid|no+|seriously|so close"
+                  r"|not again|this is (?:so )?hard|i (?:hate|suck)|f+u+c+k+\w*|shit|oh man"),
+    (CELEBRATION, r"ye+s+|yeah+|wo+(?:h+o+)?|wo+w|let'?s go+|i did it|nice|awesome|finally|got it|ya+y+"),
+]
+_INTENTS = [(intent, re.compile(rf"\b(?:{pattern})\b")) for intent, pattern in _PATTERNS]
+_QUESTION = re.compile(r"^(?:why|how|what|when|where|who|which|should|can|could|do|does|is|am)\b")
+
+
+def route(text: Optional[str]) -> Optional[str]:
+    """The local intent for a transcript, or None if it needs the LLM."""
+    clean_text = (text or "").strip().lower()
+
+    # STT marks non-speech as "(laughs)", "(background noise)", ...
+    if clean_text.startswith("(") or len(clean_text) < 2:
+        return SILENCE
+
+    short = ("?" not in clean_text and not _QUESTION.match(clean_text)
+             and len(clean_text.split()) <= ROUTE_MAX_WORDS)
+    for intent, pattern in _INTENTS:
+        if (intent == STOP or short) and pattern.search(clean_text):
+            return intent
+    return None
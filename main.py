@@ -1,78 +1,132 @@
 import time
-import asyncio
-import threading
 import queue
 import pygame
 from google.adk.runners import InMemoryRunner
-from google.genai import types 
 from flap import FlappyGame
-from speech_tools import Environment
+from speech_tools import Environment, split_sentences
+from agent_worker import AgentWorker
 from agent_def import flappy_agent
 import agent_audio_manager 
+from intent_router import route, SILENCE, STOP, FRUSTRATION, CELEBRATION
+from conversation import ConversationContext
+from game_logger import session_stats
+import config
+
+# A speculative reply is used as-is when the player only reacts briefly
+SPECULATION_MAX_WORDS = 4
+
+
+def near_miss_note(min_clearance):
+    """How close the round came to ending earlier, from the telemetry ("" if no pipe was reached)."""
+    if min_clearance is None:
+        return ""
+    return f", Closest call: {max(min_clearance, 0)}px from a pipe"
+
+
+def speculative_prompt(context):
+    """Agent input for a reply drafted at the moment of death, before the player speaks."""
+    recent = ", ".join(str(score) for score in context["recent_scores"]) or "none"
+    return (
+        f"[Event: death, Score: {context['score']}{near_miss_note(context['min_clearance'])}] "
+        f"(The bird just hit the {context['death_cause']}. High score: {context['high_score']}, "
+        f"recent scores: {recent}. The player has not spoken yet: react to this death.)"
+    )
+
+
+def fits_speculation(clean_text):
+    """True for short reactions ("argh", "come on!") that the drafted reply already covers."""
+    return "?" not in clean_text and len(clean_text.split()) <= SPECULATION_MAX_WORDS
+
+
+def has_clip_for(intent, game):
+    """The high-score clips announce a record, so celebrations only get one right after a record."""
+    if intent == CELEBRATION:
+        return game.score == game.high_score > 0
+    return intent == FRUSTRATION
+
+
+def play_intent_clip(intent, death_cause):
+    """Prerecorded answer for a locally routed intent (no LLM or TTS round trip)."""
+    if intent == CELEBRATION:
+        agent_audio_manager.play_high_score()
+    elif death_cause == "ground":
+        agent_audio_manager.play_ground_loss()
+    else:
+        agent_audio_manager.play_pipe_loss()
 
-def agent_worker(runner, session_id, input_queue, output_queue):
-    """
-    Background thread that maintains the asyncio loop for the Agent.
-    Prevents 'Event Loop Closed' errors and keeps the game running smoothly.
-    """
-    async def processing_loop():
-        print(" [System] Agent Brain Online (Background Thread)")
-        while True:
-            loop = asyncio.get_running_loop()
-            try:
-                # Wait for input from the main thread
-                msg_context = await loop.run_in_executor(None, input_queue.get)
-            except Exception:
-                break
-            
-            if msg_context is None: 
-                break
-
-            try:
-                agent_input = types.Content(role="user", parts=[types.Part(text=msg_context)])
-                async for event in runner.run_async(user_id="player_1", session_id=session_id, new_message=agent_input):
-                    if event.content and event.content.parts:
-                        part = event.content.parts[0]
-                        if part.text:
-                            output_queue.put(part.text)
-                            break 
-            except Exception as e:
-                print(f"[Worker] Agent Brain Error: {e}")
-    
-    asyncio.run(processing_loop())
 
 def main():
-    game = FlappyGame()
+    game = FlappyGame(dirty_rendering=config.DIRTY_RENDERING)
     env = Environment()
     runner = InMemoryRunner(agent=flappy_agent, app_name="flappy_bird_agent")
     
-    agent_input_queue = queue.Queue()
-    agent_output_queue = queue.Queue()
+    # What the agent remembers: recent turns verbatim, older ones summarized
+    conversation = ConversationContext(keep_turns=config.CONTEXT_KEEP_TURNS)
 
-    print("Initializing Agent Session...")
-    session = asyncio.run(runner.session_service.create_session(app_name="flappy_bird_agent", user_id="player_1"))
-    
-    # Start the background worker (for the Agent)
-    t = threading.Thread(target=agent_worker, args=(runner, session.id, agent_input_queue, agent_output_queue), daemon=True)
-    t.start()
-
-    print("--- Flappy Bird Agent Session Started ---")
+    # --- Speculative Replies ---
+    # At each death the agent drafts a reply right away and its audio is
+    # pre-synthesized; when the player speaks it is used, adapted or dropped.
+    speculation = None  # {"death": loss_count, "text": ...} for the current game-over screen
 
     # --- Safe Shutdown State ---
     shutdown_timer = None 
 
+    # --- Agent Results ---
+    # The worker's callbacks run on its loop thread, so they only queue what
+    # arrived; the game loop applies it (conversation, speculation, speech).
+    agent_results = queue.Queue()
+    current_turn = None  # number of the last turn sent to the LLM; older sentences are stale
+
+    # Start the background worker (for the Agent)
+    agent = AgentWorker(
+        runner,
+        on_sentence=lambda turn, sentence, new_reply: agent_results.put(("sentence", turn, sentence, new_reply)),
+        on_draft=lambda death_id, draft: agent_results.put(("draft", death_id, draft)),
+    ).start()
+
+    def on_death(context):
+        if game.agent_enabled and shutdown_timer is None:
+            agent.speculate(context["loss_count"], speculative_prompt(context))
+
+    game.on_death = on_death
+
+    print("--- Flappy Bird Agent Session Started ---")
+
     running = True
     while running:
         # --- Update Environment ---
         env.update()
 
         # BRIDGE: if LLM is busy, tell the Audio Manager to hold reflexes.
-        is_thinking = not agent_input_queue.empty() or not agent_output_queue.empty()
-        agent_audio_manager.set_llm_busy_state(env.is_speaking or is_thinking)
+        # (Speech that is already playing or queued is handled by the audio scheduler.)
+        agent_audio_manager.set_llm_busy_state(agent.busy or env.is_generating_tts)
 
         # variable to make the agent move its mouth
         game.is_talking = env.is_speaking
 
+        # --- Apply Agent Results ---
+        while not agent_results.empty():
+            result = agent_results.get_nowait()
+            if result[0] == "sentence":
+                _, turn, sentence, new_reply = result
+                # Don't speak a cancelled reply, or new ideas while shutting down
+                if turn != current_turn or shutdown_timer is not None:
+                    continue
+                print(f"[AGENT] Idea ready: {sentence}")
+                conversation.add_agent(sentence)
+                env.speak_to_user(sentence, interrupt=new_reply)
+            else:
+                _, death_id, draft = result
+                if draft and death_id == game.loss_count and not game.alive:
+                    speculation = {"death": death_id, "text": draft}
+                    print(f"[AGENT] Speculative draft ready: {draft}")
+                    for sentence in split_sentences(draft):
+                        env.prefetch_speech(sentence)
+
+        # A draft only fits the game-over screen it was written for
+        if speculation is not None and (game.alive or speculation["death"] != game.loss_count):
+            speculation = None
+
         # --- Check for User Voice Input ---
         # If we are shutting down, stop listening to the user.
         if shutdown_timer is None:
@@ -83,53 +137,71 @@ def main():
         if user_text:
             print(f"\n[USER] Said: {user_text}")
             clean_text = user_text.strip().lower()
+            intent = route(clean_text)
 
             # --- FILTER 1: Ghost Inputs ---
-            if clean_text.startswith("(") or len(clean_text) < 2:
+            if intent == SILENCE:
                 print(f"[SYSTEM] Ignoring ghost input: {clean_text}")
                 user_text = None 
 
             # --- FILTER 2: Stop Command ---
-            stop_phrases = ["i want to stop", "stop now", "end the game", "i'm done"]
-            if any(phrase in clean_text for phrase in stop_phrases):
+            if intent == STOP:
                 print("[SYSTEM] Stop command detected. Shutting down in 5s...")
                 # 1. Play Outro
                 agent_audio_manager.play_outro()
-                # 2. Disable Agent (Stop listening)
+                # 2. Disable Agent (Stop listening) and drop any reply in progress
                 game.agent_enabled = False 
+                agent.cancel()
+                current_turn = None
+                env.cancel_speech()
                 # 3. Start The Safe Shutdown Timer
                 # We give it 12 seconds for the audio to play out smoothly.
                 shutdown_timer = time.time() + 12.0
                 
                 user_text = None 
             
+            # --- Use the Speculative Draft ---
+            if user_text and speculation is not None and fits_speculation(clean_text):
+                print(f"[AGENT] Using speculative reply: {speculation['text']}")
+                conversation.add_user(user_text)
+                conversation.add_agent(speculation["text"])
+                for i, sentence in enumerate(split_sentences(speculation["text"])):
+                    env.speak_to_user(sentence, interrupt=(i == 0))
+                speculation = None
+                user_text = None
+
+            # --- Local Intents: frequent reactions get a prerecorded clip ---
+            # (other celebrations go to the LLM: there is no neutral clip for them)
+            if user_text and has_clip_for(intent, game):
+                print(f"[AGENT] Local intent '{intent}', answering with a clip")
+                play_intent_clip(intent, game.core.death_cause)
+                conversation.add_user(user_text)
+                conversation.add_agent("(prerecorded encouragement)")
+                user_text = None
+
             # --- Process Valid Input ---
             if user_text:
                 state = game.get_state()
+                # On the game-over screen the telemetry still holds the round that just ended
+                near_miss = near_miss_note(game.telemetry.min_clearance()) if not game.alive else ""
                 context_str = (
                     f"[Event: {'death' if state['loss_count'] > 0 else 'playing'}, "
-                    f"Score: {state['score']}] "
+                    f"Score: {state['score']}{near_miss}] "
                     f"User said: \"{user_text}\""
                 )
+                if speculation is not None:
+                    # Adapt: the LLM may keep the draft, whose audio is already cached
+                    context_str += f" (Draft reply, keep it word for word if it still fits: \"{speculation['text']}\")"
+                    speculation = None
+                conversation.add_user(user_text)
                 print(f"[AGENT] Sending to LLM...")
-                agent_input_queue.put(context_str)
-
-        # --- Check for LLM Output ---
-        if shutdown_timer is None: # Don't speak new ideas if shutting down
-            if not agent_output_queue.empty():
-                if not pygame.mixer.Channel(0).get_busy():
-                    try:
-                        response_text = agent_output_queue.get_nowait()
-                        print(f"[AGENT] Idea ready: {response_text}")
-                        env.speak_to_user(response_text)
-                    except queue.Empty:
-                        pass
+                current_turn = agent.submit(conversation.build_message(context_str, session_stats(game.session_log)))
 
         # --- Agent Trigger Logic ---
         if game.agent_enabled and shutdown_timer is None:
             state = game.get_state()
             if state['loss_count'] > 0 and not state['game_active']:
-                 env.listen_to_user(duration=4.5)
+                 env.listen_to_user()
 
         # --- Step the Game ---
         if running:
@@ -143,6 +215,8 @@ def main():
                 running = False
 
     # pygame cleanup
+    agent.close()
+    env.close()
     pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""
+Always-open microphone input feeding a NumPy ring buffer.
+
+The input device is opened once per session, so a listen request costs no
+device-open latency. And because the buffer already holds the last few
+seconds, a recording can start slightly in the past (pre-roll): a player
+who starts talking just before listen_to_user() is called keeps their
+first word.
+
+The PortAudio callback is the only writer. It copies each block into the
+ring and only then advances `written` (total samples so far), so readers
+never take a lock: anything before `written` is complete, and it stays
+valid until the ring wraps around, capacity samples later.
+"""
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+import sounddevice as sd
+
+
+class MicrophoneRing:
+    def __init__(self, sample_rate: int, seconds: float = 30.0, blocksize: int = 0):
+        self.sample_rate = sample_rate
+        self.capacity = int(sample_rate * seconds)
+        self.buffer = np.zeros(self.capacity, dtype=np.int16)
+        self.written = 0  # total samples captured since start()
+        self.overflows = 0
+        self._stream = sd.InputStream(samplerate=sample_rate, channels=1, dtype='int16',
+                                      blocksize=blocksize, callback=self._callback)
+
+    def start(self) -> "MicrophoneRing":
+        self._stream.start()
+        return self
+
+    def close(self) -> None:
+        self._stream.stop()
+        self._stream.close()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status.input_overflow:
+            self.overflows += 1
+        i = self.written % self.capacity
+        first = min(frames, self.capacity - i)
+        self.buffer[i:i + first] = indata[:first, 0]
+        self.buffer[:frames - first] = indata[first:, 0]
+        self.written += frames  # publish only after the samples are in place
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy of samples [start, end) by absolute position (clamped to what the ring still holds)."""
+        start = max(start, end - self.capacity, 0)
+        idx = np.arange(start, end) % self.capacity
+        return self.buffer[idx]
+
+    def frames(self, start: int, frame_len: int, timeout: Optional[float] = None) -> Iterator[np.ndarray]:
+        """
+        Yields consecutive frame_len frames from absolute position start,
+        waiting for the callback when the reader catches up with it.
+        Stops if no new audio arrives within timeout seconds (device gone).
+        """
+        position = max(start, self.written - self.capacity, 0)
+        poll = frame_len / self.sample_rate / 2
+        waited = 0.0
+        while True:
+            position = max(position, self.written - self.capacity)  # skip audio already overwritten
+            if self.written - position >= frame_len:
+                yield self.read(position, position + frame_len)
+                position += frame_len
+                waited = 0.0
+                continue
+            if timeout is not None and waited >= timeout:
+                return
+            time.sleep(poll)
+            waited += poll
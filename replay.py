@@ -0,0 +1,105 @@
+"""
+Frame-exact input recording and headless replay.
+
+A round is fully determined by its seed (FlappyCore.reset(seed)) and the
+flap/no-flap input of every frame after the starting jump, so that is all
+a recording stores. The file format is tiny and fixed:
+
+    header  <4s B Q I>  magic b"FLPR", version, round seed, frame count
+    body    one bit per frame (1 = flap), LSB first, padded to a byte
+
+Replays re-simulate through FlappyCore with no window and no frame cap:
+
+    python replay.py replays/*.flr
+"""
+import os
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from game_core import FlappyCore
+
+MAGIC = b"FLPR"
+VERSION = 1
+_HEADER = struct.Struct("<4sBQI")
+
+REPLAY_DIR = "replays"
+
+
+class InputRecorder:
+    """Collects the per-frame input of one round as a packed bit stream."""
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.frames = 0
+        self._bits = bytearray()
+
+    def record(self, jump: bool):
+        bit = self.frames & 7
+        if bit == 0:
+            self._bits.append(0)
+        if jump:
+            self._bits[-1] |= 1 << bit
+        self.frames += 1
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(MAGIC, VERSION, self.seed, self.frames) + bytes(self._bits)
+
+    def save(self, path: str) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+
+def decode(data: bytes) -> Tuple[int, List[bool]]:
+    """Returns (seed, per-frame jump flags) from a recording's bytes."""
+    magic, version, seed, frames = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a v{VERSION} Flappy replay (magic={magic!r}, version={version})")
+    body = data[_HEADER.size:]
+    return seed, [bool(body[i >> 3] >> (i & 7) & 1) for i in range(frames)]
+
+
+def load(path: str) -> Tuple[int, List[bool]]:
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def simulate(seed: int, inputs: List[bool]) -> Dict[str, Any]:
+    """Replays one round headlessly; returns what finish_game would have logged."""
+    core = FlappyCore()
+    core.reset(seed)
+    core.step("jump")
+    for jump in inputs:
+        core.step("jump" if jump else None)
+        if not core.alive:
+            break
+    return {
+        "seed": seed,
+        "duration_ticks": core.ticks_played,
+        "final_score": core.score,
+        "death_cause": core.death_cause,
+    }
+
+
+def replay_file(path: str) -> Dict[str, Any]:
+    seed, inputs = load(path)
+    return simulate(seed, inputs)
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [os.path.join(REPLAY_DIR, name) for name in sorted(os.listdir(REPLAY_DIR))]
+    frames = 0
+    start = time.perf_counter()
+    for path in paths:
+        result = replay_file(path)
+        frames += result["duration_ticks"]
+        print(f"{path}: score {result['final_score']}, {result['duration_ticks']} ticks, "
+              f"death: {result['death_cause']}")
+    elapsed = time.perf_counter() - start
+    if frames:
+        print(f"{len(paths)} games, {frames} frames in {elapsed:.2f}s ({frames / elapsed:.0f} FPS)")
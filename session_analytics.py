@@ -0,0 +1,217 @@
+"""
+Cross-session analytics over the per-session game logs in logs/.
+
+    python session_analytics.py              # report for logs/
+    python session_analytics.py path/to/logs
+
+Each session log is reduced once to a small summary (score histograms and
+death-cause counts split by agent off/on, play time, time to the agent's
+first intervention). Summaries are kept in an index file next to the logs,
+keyed by each log's mtime and size, so a re-run over thousands of sessions
+only parses the files that changed. Everything above the per-file summary
+is NumPy over stacked arrays.
+
+"Did the agent help?" is answered two ways: pooled (all agent-on games vs
+all agent-off games) and within-session (the mean per-session difference,
+over sessions that have games on both sides of the intervention).
+"""
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from game_logger import LOG_DIR, iter_session
+
+INDEX_NAME = "analytics_index.json"
+INDEX_VERSION = 1
+CAUSES = ("ground", "pipe", "other")
+OFF, ON = 0, 1  # column order of every off/on pair
+
+# --- Per-session summaries (path -> (mtime_ns, size, summary)) ---
+_summaries: Dict[str, tuple] = {}
+
+
+def summarize_log(log_path: str) -> Dict[str, Any]:
+    """Reduces one session log to the counts the aggregate needs (JSON-friendly)."""
+    games = [g for g in iter_session(log_path) if g.get("final_score") is not None]
+    score = np.array([g["final_score"] for g in games], dtype=np.int64)
+    ticks = np.array([g.get("duration_ticks") or 0 for g in games], dtype=np.int64)
+    agent = np.array([bool(g.get("agent_enabled")) for g in games], dtype=bool)
+    start = np.array([g.get("start_time") or 0.0 for g in games], dtype=np.float64)
+    cause = np.array([CAUSES.index(g.get("death_cause")) if g.get("death_cause") in CAUSES
+                      else len(CAUSES) - 1 for g in games], dtype=np.int64)
+
+    # score_hist[side][s] = games with final score s
+    bins = int(score.max()) + 1 if len(score) else 1
+    score_hist = [np.bincount(score[agent == side], minlength=bins).tolist() for side in (OFF, ON)]
+    causes = [np.bincount(cause[agent == side], minlength=len(CAUSES)).tolist() for side in (OFF, ON)]
+
+    first_on = np.flatnonzero(agent)
+    intervention = None
+    if len(first_on):
+        i = int(first_on[0])
+        intervention = {
+            "games": i,
+            "ticks": int(ticks[:i].sum()),
+            "seconds": float(start[i] - start[0]),
+        }
+
+    return {
+        "games": len(games),
+        "score_hist": score_hist,
+        "causes": causes,
+        "ticks": [int(ticks[agent == side].sum()) for side in (OFF, ON)],
+        "intervention": intervention,
+    }
+
+
+def _load_index(log_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(log_dir, INDEX_NAME), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index.get("sessions", {}) if index.get("version") == INDEX_VERSION else {}
+
+
+def _save_index(log_dir: str, sessions: Dict[str, Any]) -> None:
+    path = os.path.join(log_dir, INDEX_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "sessions": sessions}, f)
+    os.replace(tmp, path)  # readers never see a half-written index
+
+
+def session_summaries(log_dir: str = LOG_DIR) -> Dict[str, Dict[str, Any]]:
+    """
+    Summary of every session log in log_dir (file name -> summary).
+    Logs whose mtime and size match the index are not re-read.
+    """
+    index = _load_index(log_dir)
+    sessions = {}
+    changed = False
+
+    for log in sorted(Path(log_dir).glob("session_*.jsonl")):
+        stat = log.stat()
+        key = [stat.st_mtime_ns, stat.st_size]
+        entry = index.get(log.name)
+        if entry is None or entry["key"] != key:
+            cached = _summaries.get(str(log))
+            if cached is not None and list(cached[:2]) == key:
+                summary = cached[2]
+            else:
+                summary = summarize_log(str(log))
+            entry = {"key": key, "summary": summary}
+            changed = True
+        _summaries[str(log)] = (key[0], key[1], entry["summary"])
+        sessions[log.name] = entry
+
+    # Also drop index entries for deleted logs
+    if changed or len(sessions) != len(index):
+        _save_index(log_dir, sessions)
+    return {name: entry["summary"] for name, entry in sessions.items()}
+
+
+def _stack_hists(summaries: List[Dict[str, Any]]) -> np.ndarray:
+    """Score histograms as one (sessions, 2, max_score + 1) array."""
+    bins = max((len(s["score_hist"][OFF]) for s in summaries), default=1)
+    hists = np.zeros((len(summaries), 2, bins), dtype=np.int64)
+    for i, s in enumerate(summaries):
+        for side in (OFF, ON):
+            hist = s["score_hist"][side]
+            hists[i, side, :len(hist)] = hist
+    return hists
+
+
+def _percentiles(hist: np.ndarray, qs=(0.25, 0.5, 0.75, 0.9)) -> Dict[str, Optional[int]]:
+    total = hist.sum()
+    if total == 0:
+        return {f"p{int(q * 100)}": None for q in qs}
+    cumulative = np.cumsum(hist)
+    return {f"p{int(q * 100)}": int(np.searchsorted(cumulative, q * total)) for q in qs}
+
+
+def aggregate(summaries: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Combines per-session summaries into the cross-session report numbers."""
+    items = list(summaries.values())
+    hists = _stack_hists(items)                                      # (S, 2, B)
+    causes = np.array([s["causes"] for s in items], dtype=np.int64).reshape(-1, 2, len(CAUSES))
+    ticks = np.array([s["ticks"] for s in items], dtype=np.int64).reshape(-1, 2)
+
+    values = np.arange(hists.shape[2])
+    games = hists.sum(axis=2)                                        # (S, 2)
+    score_sum = (hists * values).sum(axis=2)                         # (S, 2)
+
+    groups = {}
+    for side, name in ((OFF, "agent_off"), (ON, "agent_on")):
+        n = int(games[:, side].sum())
+        cause_totals = causes[:, side].sum(axis=0)
+        groups[name] = {
+            "games": n,
+            "mean_score": float(score_sum[:, side].sum() / n) if n else None,
+            "mean_ticks": float(ticks[:, side].sum() / n) if n else None,
+            "score_distribution": hists[:, side].sum(axis=0).tolist(),
+            **_percentiles(hists[:, side].sum(axis=0)),
+            "death_cause_ratio": {cause: float(count / n) if n else None
+                                  for cause, count in zip(CAUSES, cause_totals)},
+        }
+
+    off, on = groups["agent_off"]["mean_score"], groups["agent_on"]["mean_score"]
+
+    # Within-session delta: only sessions that played on both sides
+    both = (games > 0).all(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        session_means = score_sum / games
+    paired = session_means[both, ON] - session_means[both, OFF]
+
+    interventions = [s["intervention"] for s in items if s["intervention"] is not None]
+    seconds = np.array([i["seconds"] for i in interventions], dtype=np.float64)
+    games_before = np.array([i["games"] for i in interventions], dtype=np.int64)
+    ticks_before = np.array([i["ticks"] for i in interventions], dtype=np.int64)
+
+    return {
+        "sessions": len(items),
+        "games": int(games.sum()),
+        **groups,
+        "pooled_score_delta": on - off if on is not None and off is not None else None,
+        "paired_sessions": int(both.sum()),
+        "paired_score_delta": float(paired.mean()) if len(paired) else None,
+        "intervention": {
+            "sessions": len(interventions),
+            "median_seconds": float(np.median(seconds)) if len(seconds) else None,
+            "median_games": float(np.median(games_before)) if len(games_before) else None,
+            "median_ticks": float(np.median(ticks_before)) if len(ticks_before) else None,
+        },
+    }
+
+
+def analyze(log_dir: str = LOG_DIR) -> Dict[str, Any]:
+    """Cross-session aggregate for every session log in log_dir."""
+    return aggregate(session_summaries(log_dir))
+
+
+def _fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_report(stats: Dict[str, Any]) -> None:
+    print(f"Sessions: {stats['sessions']}  Games: {stats['games']}")
+    for name in ("agent_off", "agent_on"):
+        g = stats[name]
+        ratios = ", ".join(f"{cause} {_fmt(r, '.0%')}" for cause, r in g["death_cause_ratio"].items())
+        print(f"{name:>9}: {g['games']} games, mean score {_fmt(g['mean_score'])} "
+              f"(p25/p50/p90 {_fmt(g['p25'], 'd')}/{_fmt(g['p50'], 'd')}/{_fmt(g['p90'], 'd')}), "
+              f"mean ticks {_fmt(g['mean_ticks'], '.0f')}, deaths: {ratios}")
+    print(f"Score delta (on - off): pooled {_fmt(stats['pooled_score_delta'], '+.2f')}, "
+          f"within-session {_fmt(stats['paired_score_delta'], '+.2f')} "
+          f"over {stats['paired_sessions']} sessions")
+    i = stats["intervention"]
+    print(f"Intervention in {i['sessions']} sessions: median {_fmt(i['median_seconds'], '.0f')}s, "
+          f"{_fmt(i['median_games'], '.0f')} games, {_fmt(i['median_ticks'], '.0f')} ticks in")
+
+
+if __name__ == "__main__":
+    print_report(analyze(sys.argv[1] if len(sys.argv) > 1 else LOG_DIR))
@@ -1,66 +1,234 @@
 import threading
 import queue
 import io
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import sounddevice as sd
 import numpy as np
 import scipy.io.wavfile as wav
+from scipy.signal import resample_poly
+from math import gcd
 import pygame
 from elevenlabs.client import ElevenLabs
 import config
+from tts_cache import TTSCache, cache_key
+from voice_activity import Endpointer
+from microphone import MicrophoneRing
+from audio_scheduler import get_scheduler, SPEECH
+
+# --- Streaming TTS ---
+FIRST_SEGMENT_MS = 100  # short first segment, so speech starts as soon as the first chunk lands
+SEGMENT_MS = 400  # later segments; each is queued on the channel before the previous one ends
+BUFFERED_FORMAT = "mp3_44100_128"  # ElevenLabs' default, used when streaming is off
+
+# --- Recording ---
+FALLBACK_RECORD_RATE = 44100  # if the device refuses config.STT_SAMPLE_RATE; resampled before upload
+VAD_FRAME_MS = 30
+
+
+def encode_upload(samples, sample_rate, upload_format):
+    """
+    Packs int16 mono samples into an in-memory file for STT.
+    FLAC needs the optional soundfile package; without it WAV is sent.
+    """
+    virtual_file = io.BytesIO()
+    if upload_format == "flac":
+        try:
+            import soundfile
+            soundfile.write(virtual_file, samples, sample_rate, format="FLAC", subtype="PCM_16")
+            virtual_file.seek(0)
+            virtual_file.name = "input.flac"
+            return virtual_file
+        except ImportError:
+            print("XXXX soundfile not installed, uploading WAV instead of FLAC")
+    wav.write(virtual_file, sample_rate, samples)
+    virtual_file.seek(0)
+    virtual_file.name = "input.wav"
+    return virtual_file
+
+
+def _http_client():
+    """One keep-alive connection pool for every ElevenLabs call (no TLS handshake per request)."""
+    return httpx.Client(
+        timeout=httpx.Timeout(config.TTS_TIMEOUT_SEC, connect=5.0),
+        limits=httpx.Limits(max_connections=config.TTS_WORKERS + 1,
+                            max_keepalive_connections=config.TTS_WORKERS + 1,
+                            keepalive_expiry=120.0),
+    )
+
+
+def _pcm_rate(output_format):
+    """Sample rate of an ElevenLabs "pcm_<rate>" output format."""
+    return int(output_format.split("_")[1])
+
+
+def pcm_to_sound(pcm, src_rate):
+    """
+    Turns 16-bit mono PCM into a Sound in the mixer's own format
+    (resampled, converted and copied to every output channel).
+    """
+    freq, size, channels = pygame.mixer.get_init()
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    if src_rate != freq and len(samples):
+        positions = np.arange(int(len(samples) * freq / src_rate)) * (src_rate / freq)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    if size == 32:  # float mixer
+        samples = np.asarray(samples, dtype=np.float32) / 32768.0
+    else:
+        samples = np.round(samples).astype(np.int16)
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pygame.mixer.Sound(buffer=np.ascontiguousarray(samples).tobytes())
+
+
+class SentenceSplitter:
+    """
+    Cuts streamed LLM text into sentences as soon as each one is complete,
+    so TTS can start on the first sentence while the rest is generating.
+    Very short sentences ("Wow!") are merged into the next one.
+    """
+    _BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["\')\]])\s+')
+
+    def __init__(self, min_chars=12):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text):
+        """Adds a chunk of text; returns the sentences it completed."""
+        self._buffer += text
+        parts = self._BOUNDARY.split(self._buffer)
+        self._buffer = parts.pop() # Still being written
+        sentences = []
+        pending = ""
+        for part in parts:
+            pending = f"{pending} {part}" if pending else part
+            if len(pending) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+        if pending:
+            self._buffer = f"{pending} {self._buffer}" if self._buffer else pending
+        return sentences
+
+    def flush(self):
+        """Whatever is left once the reply is complete."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
+
+
+def split_sentences(text, min_chars=12):
+    """The sentences SentenceSplitter would produce for a complete text."""
+    splitter = SentenceSplitter(min_chars)
+    sentences = splitter.feed(text)
+    rest = splitter.flush()
+    return sentences + [rest] if rest else sentences
+
 
 class Environment:
     def __init__(self):
-        self.client = ElevenLabs(api_key=config.EL_API_KEY)
+        self.http = _http_client()
+        self.client = ElevenLabs(api_key=config.EL_API_KEY, httpx_client=self.http)
         self.agent_voice_id = config.VOICE_ID # Olga, cus we cool
         self.model_id_speak = config.MODEL_ID_SPEAK
         self.model_id_listen= config.MODEL_ID_LISTEN
+        self.tts_cache = TTSCache(config.TTS_CACHE_DIR, config.TTS_CACHE_MAX_MB * 1024 * 1024)
         
         # --- Asynchronous Communication Queues ---
-        self.tts_payload_queue = queue.Queue() # Holds audio bytes ready to play
+        self.tts_payload_queue = queue.Queue() # Holds audio bytes / streamed segments ready to play
         self.stt_result_queue = queue.Queue()  # Holds transcribed text from user
         
         # --- State Flags ---
         self.is_listening = False
         self.is_generating_tts = False # True when downloading audio (before playing)
+        self._stop_speech = False # Set by cancel_speech; update() silences the scheduler
+        # A reply may be several parts (sentences) synthesized in parallel; they play in order
+        self._parts = {} # part number -> payloads received so far
+        self._next_part = 0 # next part to play
+        self._part_count = 0 # parts handed out for the current reply
+        # speak_to_user / cancel_speech may be called from the agent thread
+        self._lock = threading.RLock()
+
+        # --- Worker Pools ---
+        # TTS jobs run on a small fixed pool; at most TTS_MAX_PENDING more may wait
+        self._tts_pool = ThreadPoolExecutor(max_workers=config.TTS_WORKERS, thread_name_prefix="tts")
+        self._tts_slots = threading.BoundedSemaphore(config.TTS_WORKERS + config.TTS_MAX_PENDING)
+        self._tts_jobs = []
+        self._tts_generation = 0 # Bumped by every new reply; older jobs see it and stop
+        self._stt_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt")
+
+        # --- Microphone ---
+        # Opened once for the whole session; listens slice its ring buffer
+        # Capture straight at the STT rate when the device allows it
+        self.mic = None
+        self.record_rate = config.STT_SAMPLE_RATE
+        for rate in (config.STT_SAMPLE_RATE, FALLBACK_RECORD_RATE):
+            try:
+                self.mic = MicrophoneRing(rate, seconds=config.MIC_BUFFER_SEC,
+                                          blocksize=rate * VAD_FRAME_MS // 1000).start()
+                self.record_rate = rate
+                break
+            except Exception as e:
+                print(f"XXXX Microphone Error at {rate} Hz: {e}")
+        if self.mic is None:
+            print("XXXX Falling back to opening the microphone per listen")
         
-        # --- Audio Channels ---
-        # Channel 0 is reserved for 'Reflexes' (flap.py / agent_audio_manager)
-        # Channel 1 is reserved for 'LLM Agent' (this file)
-        self.reflex_channel_id = 0
-        self.agent_channel_id = 1 
+        # --- Audio ---
+        # Speech is played by the shared scheduler (Channel 1; Channel 0 holds the prerecorded clips),
+        # which update() advances
+        self.scheduler = get_scheduler()
 
     @property
     def is_speaking(self):
         """
         Returns True if the Agent is EITHER generating text OR playing audio.
-        Crucially, checks BOTH the LLM channel and the Hard-coded Reflex channel.
+        Crucially, covers both the LLM speech and the prerecorded clips.
         """
         # 1. Is Python currently downloading audio?
         if self.is_generating_tts:
             return True
-            
-        # 2. Is Pygame playing audio?
-        if pygame.mixer.get_init():
-            llm_busy = pygame.mixer.Channel(self.agent_channel_id).get_busy()
-            reflex_busy = pygame.mixer.Channel(self.reflex_channel_id).get_busy()
-            return llm_busy or reflex_busy
-            
-        return False
+
+        # 2. Is anything playing or queued on the agent's voice?
+        return self.scheduler.voice_busy
 
     def update(self):
         """
         Must be called every frame to process background threads.
         """
-        # Handle Incoming TTS Audio (Agent finished generating speech)
-        while not self.tts_payload_queue.empty():
-            try:
-                audio_bytes = self.tts_payload_queue.get_nowait()
-                # Generation is done, now we play (which sets get_busy() to True)
-                self.is_generating_tts = False 
-                self._play_audio_bytes(audio_bytes)
-            except queue.Empty:
-                pass
+        with self._lock:
+            if self._stop_speech:
+                self.scheduler.stop(SPEECH)
+                self._stop_speech = False
+
+            # Handle Incoming TTS Audio: ready-to-play Sounds (decoded by the TTS workers,
+            # never here) and the end-of-part marker (None), each tagged with (generation, part)
+            while not self.tts_payload_queue.empty():
+                try:
+                    generation, part, payload = self.tts_payload_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if generation != self._tts_generation:
+                    continue # Left over from a superseded reply
+                self._parts.setdefault(part, []).append(payload)
+
+            # Release parts strictly in order, even if a later sentence finished first
+            while self._next_part in self._parts:
+                payloads = self._parts[self._next_part]
+                for payload in payloads:
+                    if payload is not None:
+                        self.scheduler.play(payload, SPEECH)
+                if payloads and payloads[-1] is None:
+                    del self._parts[self._next_part]
+                    self._next_part += 1
+                else:
+                    payloads.clear()
+                    break
+
+            # Still downloading until every part so far has ended
+            self.is_generating_tts = self._next_part < self._part_count
+
+        # Start what is due (also when no game loop drives the scheduler; a second call per frame is harmless)
+        self.scheduler.update()
 
     def get_latest_input(self):
         """
@@ -73,21 +241,64 @@ class Environment:
 
     # --- Public Methods ---
 
-    def speak_to_user(self, text):
+    def speak_to_user(self, text, interrupt=True):
         """
         Starts a background thread to fetch audio. Non-blocking.
+        interrupt=False appends text to the current reply (e.g. the next
+        sentence of a streamed LLM answer); it plays after what is queued.
         """
         if not text: return
+
+        with self._lock:
+            # A newer reply supersedes anything still queued or downloading
+            if interrupt:
+                self.cancel_speech()
+            if not self._tts_slots.acquire(blocking=False):
+                print(f"XXXX TTS queue full, dropping speech: {text}")
+                return
         
-        # Set Lock IMMEDIATELY so we don't try to listen while downloading
-        self.is_generating_tts = True
-        print(f"(SPEAKING) Agent queuing speech: {text}")
+            # Set Lock IMMEDIATELY so we don't try to listen while downloading
+            self.is_generating_tts = True
+            print(f"(SPEAKING) Agent queuing speech: {text}")
         
-        threading.Thread(target=self._thread_fetch_tts, args=(text,), daemon=True).start()
+            target = self._thread_stream_tts if config.TTS_STREAMING else self._thread_fetch_tts
+            job = self._tts_pool.submit(target, text, self._tts_generation, self._part_count)
+            self._part_count += 1
+            job.add_done_callback(lambda _: self._tts_slots.release()) # Also runs if cancelled
+            self._tts_jobs.append(job)
 
-    def listen_to_user(self, duration=4):
+    def prefetch_speech(self, text):
+        """
+        Synthesizes text into the TTS cache without playing it, so a later
+        speak_to_user(text) starts instantly (e.g. a speculative reply).
         """
-        Starts a background thread to record. 
+        if not text or not self._tts_slots.acquire(blocking=False):
+            return
+        job = self._tts_pool.submit(self._thread_prefetch_tts, text)
+        job.add_done_callback(lambda _: self._tts_slots.release())
+
+    def cancel_speech(self):
+        """
+        Drops every reply that is queued, downloading or not fully played yet.
+        Jobs that already started notice the new generation and stop early.
+        """
+        with self._lock:
+            self._tts_generation += 1
+            for job in self._tts_jobs:
+                job.cancel() # Only succeeds for jobs that have not started
+            self._tts_jobs = []
+            self._parts.clear()
+            self._next_part = 0
+            self._part_count = 0
+
+            # The scheduler belongs to the main thread; update() applies this
+            self._stop_speech = True
+            self.is_generating_tts = False
+
+    def listen_to_user(self, duration=None):
+        """
+        Starts a background thread that records one utterance (voice-activity
+        endpointed; duration caps its length, default config.VAD_MAX_SPEECH_SEC).
         Returns True if started, False if rejected (because agent is speaking).
         """
         # If agent is speaking/generating, we REJECT the listen request.
@@ -96,42 +307,175 @@ class Environment:
         if self.is_listening: return False
 
         self.is_listening = True
-        print(f"(LISTENING) Agent listening ({duration}s)...")
+        if duration is None:
+            duration = config.VAD_MAX_SPEECH_SEC
+        print(f"(LISTENING) Agent listening (up to {duration}s)...")
         
-        threading.Thread(target=self._thread_record_stt, args=(duration,), daemon=True).start()
+        self._stt_pool.submit(self._thread_record_stt, duration)
         return True
 
+    def close(self):
+        """Stops the worker pools and closes the HTTP connections."""
+        self.cancel_speech()
+        self._tts_pool.shutdown(wait=False, cancel_futures=True)
+        self._stt_pool.shutdown(wait=False, cancel_futures=True)
+        if self.mic is not None:
+            self.mic.close()
+        self.http.close()
+
     # --- Internal Background Threads ---
 
-    def _thread_fetch_tts(self, text):
+    def _tts_key(self, text, output_format):
+        return cache_key(text, self.agent_voice_id, self.model_id_speak, output_format)
+
+    def _thread_fetch_tts(self, text, generation, part):
         try:
+            key = self._tts_key(text, BUFFERED_FORMAT)
+            audio_data = self.tts_cache.get(key, BUFFERED_FORMAT)
+            if audio_data is None:
+                audio_generator = self.client.text_to_speech.convert(
+                    text=text,
+                    voice_id=self.agent_voice_id,
+                    model_id=self.model_id_speak,
+                    output_format=BUFFERED_FORMAT,
+                    request_options={"timeout_in_seconds": config.TTS_TIMEOUT_SEC}
+                )
+                audio_data = b"".join(chunk for chunk in audio_generator)
+                self.tts_cache.put(key, BUFFERED_FORMAT, audio_data)
+            if generation != self._tts_generation:
+                return # Superseded while downloading, don't bother decoding
+            # Decode here rather than in update(): a long reply takes tens of ms
+            sound = self._decode_audio_bytes(audio_data)
+            if sound is not None:
+                self.tts_payload_queue.put((generation, part, sound))
+        except Exception as e:
+            print(f"XXXX TTS Error: {e}")
+        finally:
+            self.tts_payload_queue.put((generation, part, None)) # End of this part (also on error)
+
+    def _thread_prefetch_tts(self, text):
+        output_format = config.TTS_STREAM_FORMAT if config.TTS_STREAMING else BUFFERED_FORMAT
+        try:
+            key = self._tts_key(text, output_format)
+            if self.tts_cache.get(key, output_format) is not None:
+                return
             audio_generator = self.client.text_to_speech.convert(
                 text=text,
                 voice_id=self.agent_voice_id,
-                model_id=self.model_id_speak
+                model_id=self.model_id_speak,
+                output_format=output_format,
+                request_options={"timeout_in_seconds": config.TTS_TIMEOUT_SEC}
             )
             audio_data = b"".join(chunk for chunk in audio_generator)
-            self.tts_payload_queue.put(audio_data)
+            if output_format.startswith("pcm"):
+                audio_data = audio_data[:len(audio_data) - len(audio_data) % 2]
+            self.tts_cache.put(key, output_format, audio_data)
+        except Exception as e:
+            print(f"XXXX TTS Prefetch Error: {e}")
+
+    def _thread_stream_tts(self, text, generation, part):
+        """
+        Plays the reply while it downloads: raw PCM chunks are cut into short
+        segments, converted to Sounds here and queued for update() to play.
+        """
+        start = time.perf_counter()
+        output_format = config.TTS_STREAM_FORMAT
+        src_rate = _pcm_rate(output_format)
+        pending = bytearray()
+        audio_data = bytearray()
+        segment_ms = FIRST_SEGMENT_MS
+        try:
+            # Cached reply: the whole thing is on disk already, no network needed
+            key = self._tts_key(text, output_format)
+            cached = self.tts_cache.get(key, output_format)
+            if cached is not None:
+                self.tts_payload_queue.put((generation, part, pcm_to_sound(cached, src_rate)))
+                return
+
+            audio_stream = self.client.text_to_speech.stream(
+                text=text,
+                voice_id=self.agent_voice_id,
+                model_id=self.model_id_speak,
+                output_format=output_format,
+                request_options={"timeout_in_seconds": config.TTS_TIMEOUT_SEC}
+            )
+            for chunk in audio_stream:
+                if generation != self._tts_generation:
+                    print("(SPEAKING) Superseded reply dropped mid-stream")
+                    return
+                pending += chunk
+                audio_data += chunk
+                segment_bytes = src_rate * segment_ms // 1000 * 2
+                while len(pending) >= segment_bytes:
+                    self.tts_payload_queue.put((generation, part, pcm_to_sound(bytes(pending[:segment_bytes]), src_rate)))
+                    del pending[:segment_bytes]
+                    if segment_ms == FIRST_SEGMENT_MS:
+                        print(f"(SPEAKING) First audio after {(time.perf_counter() - start) * 1000:.0f} ms")
+                        segment_ms = SEGMENT_MS
+                        segment_bytes = src_rate * segment_ms // 1000 * 2
+
+            tail = len(pending) - len(pending) % 2
+            if tail:
+                self.tts_payload_queue.put((generation, part, pcm_to_sound(bytes(pending[:tail]), src_rate)))
+            self.tts_cache.put(key, output_format, bytes(audio_data[:len(audio_data) - len(audio_data) % 2]))
         except Exception as e:
             print(f"XXXX TTS Error: {e}")
-            self.is_generating_tts = False # Release lock on error
+        finally:
+            self.tts_payload_queue.put((generation, part, None)) # End of this part (also releases the lock on error)
+
+    def _record_utterance(self, duration):
+        """
+        Records until the player stops talking (or never starts).
+        Returns the int16 samples, or None if there was no speech.
+        """
+        sample_rate = self.record_rate
+        frame_len = sample_rate * VAD_FRAME_MS // 1000
+        endpointer = Endpointer(
+            sample_rate,
+            silence_sec=config.VAD_SILENCE_SEC,
+            margin_db=config.VAD_MARGIN_DB,
+            max_speech_sec=duration,
+            start_timeout_sec=config.VAD_START_TIMEOUT_SEC
+        )
+        if self.mic is not None:
+            # Start in the past, so speech that began just before this call is kept
+            start = self.mic.written - int(config.MIC_PREROLL_SEC * sample_rate)
+            for frame in self.mic.frames(start, frame_len, timeout=1.0):
+                endpointer.push(frame)
+                if endpointer.done:
+                    break
+            return endpointer.utterance
+
+        # Blocking reads are fine HERE because we are in a background thread
+        with sd.InputStream(samplerate=sample_rate, channels=1, dtype='int16', blocksize=frame_len) as stream:
+            while not endpointer.done:
+                frame, _ = stream.read(frame_len)
+                endpointer.push(frame[:, 0])
+        return endpointer.utterance
 
     def _thread_record_stt(self, duration):
         try:
-            sample_rate = 44100
-            # blocking=True is fine HERE because we are in a background thread
-            audio_data = sd.rec(int(duration * sample_rate), samplerate=sample_rate, channels=1, dtype='int16', blocking=True)
-            
-            virtual_file = io.BytesIO()
-            wav.write(virtual_file, sample_rate, audio_data)
-            virtual_file.seek(0)
-            virtual_file.name = "input.wav"
+            audio_data = self._record_utterance(duration)
+            if audio_data is None:
+                print("(LISTENING) No speech detected, nothing sent to STT")
+                return
+
+            sample_rate = config.STT_SAMPLE_RATE
+            if self.record_rate != sample_rate:
+                step = gcd(sample_rate, self.record_rate)
+                audio_data = resample_poly(audio_data, sample_rate // step, self.record_rate // step)
+                audio_data = np.clip(np.round(audio_data), -32768, 32767).astype(np.int16)
+
+            virtual_file = encode_upload(audio_data, sample_rate, config.STT_UPLOAD_FORMAT)
+            print(f"(LISTENING) Uploading {len(audio_data) / sample_rate:.1f}s "
+                  f"({virtual_file.getbuffer().nbytes // 1024} KB {virtual_file.name})")
 
             transcription = self.client.speech_to_text.convert(
                 file=virtual_file,
                 model_id=self.model_id_listen,
                 tag_audio_events=True,
-                language_code='eng'
+                language_code='eng',
+                request_options={"timeout_in_seconds": config.STT_TIMEOUT_SEC}
             )
             
             user_text = str(transcription.text).strip()
@@ -143,11 +487,12 @@ class Environment:
         finally:
             self.is_listening = False
 
-    def _play_audio_bytes(self, audio_data):
+    def _decode_audio_bytes(self, audio_data):
+        # Runs on a TTS worker; SDL_mixer converts to the mixer format while loading.
+        # Played on Channel 1 by the audio scheduler (leaving Channel 0 free for the clips)
         try:
             sound_file = io.BytesIO(audio_data)
-            sound = pygame.mixer.Sound(sound_file)
-            # Play on Channel 1 (leaving Channel 0 free for game sounds)
-            pygame.mixer.Channel(self.agent_channel_id).play(sound)
+            return pygame.mixer.Sound(sound_file)
         except Exception as e:
-            print(f"XXXX Playback Error: {e}")
\ No newline at end of file
+            print(f"XXXX Playback Error: {e}")
+            return None
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Process-wide sprite registry.
+
+Every sprite image is decoded from disk once, then scaled / flipped /
+converted once per variant, and the same Surface (and Mask) is handed to
+every sprite that asks for it. Spawning pipes or respawning the bird does
+no file I/O after the first round.
+
+Surfaces are only converted to the display format when a display exists,
+so the headless core can use the same registry for its masks.
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+import pygame
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SPRITE_DIR = os.path.join(BASE_DIR, "assets", "sprites")
+
+Size = Optional[Tuple[int, int]]
+
+# --- Caches ---
+_sources: Dict[str, pygame.Surface] = {}  # raw decoded PNGs
+_images: Dict[tuple, pygame.Surface] = {}  # (name, size, flip_y, alpha, converted) -> Surface
+_masks: Dict[tuple, pygame.mask.Mask] = {}  # (name, size, flip_y) -> Mask
+_numbers: Dict[int, pygame.Surface] = {}  # score -> digits composed from 0.png..9.png
+
+
+def _source(name: str) -> pygame.Surface:
+    surface = _sources.get(name)
+    if surface is None:
+        surface = pygame.image.load(os.path.join(SPRITE_DIR, name))
+        _sources[name] = surface
+    return surface
+
+
+def _variant(name: str, size: Size, flip_y: bool) -> pygame.Surface:
+    surface = _source(name)
+    if size is not None and surface.get_size() != tuple(size):
+        surface = pygame.transform.scale(surface, size)
+    if flip_y:
+        surface = pygame.transform.flip(surface, False, True)
+    return surface
+
+
+def get_image(name: str, size: Size = None, flip_y: bool = False, alpha: bool = True) -> pygame.Surface:
+    """
+    Returns the shared Surface for a sprite file in assets/sprites.
+    Treat it as read-only: every caller gets the same object.
+    alpha=False converts without per-pixel alpha (for opaque backgrounds).
+    """
+    converted = pygame.display.get_surface() is not None
+    key = (name, size, flip_y, alpha, converted)
+    surface = _images.get(key)
+    if surface is None:
+        surface = _variant(name, size, flip_y)
+        if converted:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        _images[key] = surface
+    return surface
+
+
+def get_number(value: int) -> pygame.Surface:
+    """A non-negative integer drawn with the 0.png..9.png digit sprites (cached)."""
+    surface = _numbers.get(value)
+    if surface is None:
+        digits = [get_image(f"{d}.png") for d in str(value)]
+        width = sum(d.get_width() for d in digits)
+        height = max(d.get_height() for d in digits)
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        x = 0
+        for digit in digits:
+            surface.blit(digit, (x, 0))
+            x += digit.get_width()
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        _numbers[value] = surface
+    return surface
+
+
+def get_mask(name: str, size: Size = None, flip_y: bool = False) -> pygame.mask.Mask:
+    """Returns the shared collision Mask for a sprite variant (no display needed)."""
+    key = (name, size, flip_y)
+    mask = _masks.get(key)
+    if mask is None:
+        mask = pygame.mask.from_surface(_variant(name, size, flip_y))
+        _masks[key] = mask
+    return mask
+
+
+def clear():
+    """Drops every cached Surface and Mask (e.g. after the display is recreated)."""
+    _sources.clear()
+    _images.clear()
+    _masks.clear()
+    _numbers.clear()
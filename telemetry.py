@@ -0,0 +1,109 @@
+"""
+Per-frame telemetry for one round, kept in a preallocated NumPy ring buffer.
+
+Each frame stores the same values FlappyGame.get_state() exposes (bird y,
+next pipe distance and gap), plus the bird velocity, whether the player
+flapped and how long the frame took. Recording is a handful of scalar
+writes into fixed arrays (a few microseconds), so it stays on in
+production. When the ring is full the oldest frames are overwritten.
+
+On death the round is written to a compressed .npz in a background
+thread:
+
+    data = numpy.load("telemetry/<session>_game_0001.npz")
+    data["player_y"], data["jump"], ...
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from game_core import PIPE_GAP
+
+TELEMETRY_DIR = "telemetry"
+BIRD_WIDTH, BIRD_HEIGHT = 34, 24  # bluebird sprite size, for clearance maths
+
+COLUMNS = {
+    "frame": np.int32,
+    "player_y": np.int32,
+    "velocity": np.float32,
+    "next_pipe_dist_x": np.int32,
+    "next_pipe_y": np.int32,
+    "jump": np.bool_,
+    "frame_ms": np.float32,
+}
+
+
+class TelemetryRing:
+    def __init__(self, capacity: int = 60 * 60 * 10):  # 10 minutes at 60 FPS
+        self.capacity = capacity
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()
+        }
+        # Bound column references: saves a dict lookup per field per frame
+        self._frame = self.columns["frame"]
+        self._player_y = self.columns["player_y"]
+        self._velocity = self.columns["velocity"]
+        self._dist = self.columns["next_pipe_dist_x"]
+        self._pipe_y = self.columns["next_pipe_y"]
+        self._jump = self.columns["jump"]
+        self._frame_ms = self.columns["frame_ms"]
+        self.count = 0  # frames recorded since reset (may exceed capacity)
+
+    def reset(self):
+        """Starts a new round; old data is simply overwritten."""
+        self.count = 0
+
+    def record(self, state, velocity: float, jump: bool, frame_ms: float):
+        """Stores one frame. state is a get_state() dict."""
+        i = self.count % self.capacity
+        self._frame[i] = self.count
+        self._player_y[i] = state["player_y"]
+        self._velocity[i] = velocity
+        self._dist[i] = state["next_pipe_dist_x"]
+        self._pipe_y[i] = state["next_pipe_y"]
+        self._jump[i] = jump
+        self._frame_ms[i] = frame_ms
+        self.count += 1
+
+    def snapshot(self, last: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Copies of the recorded columns in chronological order (optionally only the last n frames)."""
+        size = min(self.count, self.capacity)
+        if last is not None:
+            size = min(size, last)
+        end = self.count % self.capacity
+        order = np.arange(end - size, end) % self.capacity
+        return {name: column[order] for name, column in self.columns.items()}
+
+    def min_clearance(self) -> Optional[int]:
+        """
+        Closest the bird came to a pipe edge (in pixels) while inside a
+        pipe's columns this round; None if it never reached a pipe.
+        Small values are the near-misses.
+        """
+        data = self.snapshot()
+        # get_state() only reports pipes the bird has not fully passed yet
+        inside = data["next_pipe_dist_x"] < BIRD_WIDTH
+        if not inside.any():
+            return None
+        below_top = data["player_y"][inside] - (data["next_pipe_y"][inside] - PIPE_GAP)
+        above_bottom = data["next_pipe_y"][inside] - (data["player_y"][inside] + BIRD_HEIGHT)
+        return int(np.minimum(below_top, above_bottom).min())
+
+    def flush(self, path: str, **meta) -> str:
+        """
+        Writes the round to a compressed .npz (columns + meta fields).
+        The copy happens now; compression and disk I/O run in a background thread.
+        """
+        data = self.snapshot()
+        data.update({key: np.asarray(value) for key, value in meta.items() if value is not None})
+
+        def _write():
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            np.savez_compressed(path, **data)
+
+        threading.Thread(target=_write, name="telemetry-flush", daemon=True).start()
+        return path
@@ -0,0 +1,123 @@
+import pygame
+import pytest
+
+from audio_scheduler import AudioScheduler, CRITICAL, SPEECH, REFLEX, CLIP_CHANNEL, SPEECH_CHANNEL
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(mixer, clock):
+    return AudioScheduler(clock=clock)
+
+
+def finish(channel_id):
+    """Ends whatever a channel plays, as if the sound had run out."""
+    pygame.mixer.Channel(channel_id).stop()
+
+
+def test_reflex_waits_for_its_delay_and_coalesces(scheduler, clock, silence):
+    assert scheduler.play(silence(5), REFLEX, delay=0.3, label="pipe", key="reflex")
+    assert not scheduler.play(silence(5), REFLEX, delay=0.3, label="ground", key="reflex")
+
+    scheduler.update()
+    assert not scheduler.is_playing()
+    assert scheduler.voice_busy  # queued counts as busy
+
+    clock.now = 0.3
+    scheduler.update()
+    assert scheduler.is_playing(REFLEX)
+
+
+def test_hold_keeps_reflexes_back_until_released(scheduler, silence):
+    scheduler.set_hold("llm", True)
+    scheduler.play(silence(5), REFLEX, expires_in=1.0)
+    scheduler.update()
+    assert not scheduler.is_playing()
+
+    scheduler.set_hold("llm", False)
+    scheduler.update()
+    assert scheduler.is_playing(REFLEX)
+
+
+def test_reflex_expires_while_speech_plays(scheduler, clock, silence):
+    scheduler.play(silence(5), SPEECH)
+    scheduler.update()
+    scheduler.play(silence(5), REFLEX, expires_in=1.0)
+
+    clock.now = 1.5
+    scheduler.update()
+    finish(SPEECH_CHANNEL)
+    scheduler.update()
+    assert not scheduler.is_playing()
+    assert not scheduler.voice_busy
+
+
+def test_speech_segments_play_in_order_on_one_channel(scheduler, silence):
+    first, second, third = silence(5), silence(5), silence(5)
+    for segment in (first, second, third):
+        scheduler.play(segment, SPEECH)
+    scheduler.update()
+
+    channel = pygame.mixer.Channel(SPEECH_CHANNEL)
+    assert channel.get_sound() is first
+    assert channel.get_queue() is second
+    assert scheduler.voice_busy  # third still waiting for the queue slot
+
+
+def test_speech_waits_for_a_playing_clip(scheduler, silence):
+    scheduler.play(silence(5), REFLEX)
+    scheduler.update()
+    scheduler.play(silence(5), SPEECH)
+    scheduler.update()
+    assert not scheduler.is_playing(SPEECH)
+
+    finish(CLIP_CHANNEL)
+    scheduler.update()
+    assert scheduler.is_playing(SPEECH)
+
+
+def test_critical_cuts_off_speech_and_drops_the_rest_of_the_reply(scheduler, silence):
+    for _ in range(4):
+        scheduler.play(silence(5), SPEECH)
+    scheduler.update()
+
+    scheduler.play(silence(5), CRITICAL, label="outro")
+    scheduler.update()
+    assert scheduler.is_playing(CRITICAL)
+    assert not scheduler.is_playing(SPEECH)
+
+    finish(CLIP_CHANNEL)
+    scheduler.update()
+    assert not scheduler.is_playing()
+    assert not scheduler.voice_busy
+
+
+def test_critical_is_not_cut_off(scheduler, silence):
+    scheduler.play(silence(5), CRITICAL, label="intro")
+    scheduler.update()
+    scheduler.play(silence(5), SPEECH)
+    scheduler.play(silence(5), CRITICAL, label="outro")
+    scheduler.update()
+    assert pygame.mixer.Channel(CLIP_CHANNEL).get_busy()
+    assert not scheduler.is_playing(SPEECH)
+
+
+def test_stop_drops_queued_and_playing_speech(scheduler, silence):
+    for _ in range(3):
+        scheduler.play(silence(5), SPEECH)
+    scheduler.update()
+    scheduler.stop(SPEECH)
+    scheduler.update()
+    assert not scheduler.voice_busy
@@ -0,0 +1,89 @@
+import os
+import threading
+import wave
+
+import numpy as np
+import pytest
+
+from clip_cache import ClipStore, sound_bytes
+
+
+@pytest.fixture
+def clips(mixer, tmp_path):
+    """Four short silent WAV clips of different lengths."""
+    paths = []
+    for i in range(4):
+        path = str(tmp_path / f"clip_{i}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(22050)
+            f.writeframes(np.zeros(2205 * (i + 1), dtype=np.int16).tobytes())
+        paths.append(path)
+    return paths
+
+
+def budget_for(store, paths):
+    return sum(sound_bytes(store.get(path)) for path in paths)
+
+
+def make_store(tmp_path, clips, policy, fits):
+    """A store whose budget holds exactly the clips in fits."""
+    probe = ClipStore(str(tmp_path / "cache"), 10 ** 9)
+    max_bytes = budget_for(probe, fits)
+    probe.close()
+    return ClipStore(str(tmp_path / "cache"), max_bytes, policy=policy)
+
+
+def test_lru_evicts_the_least_recently_played(tmp_path, clips):
+    a, b, c, d = clips
+    store = make_store(tmp_path, clips, "lru", [b, c, d])
+    for path in (a, a, a, b, c):
+        store.get(path)
+    store.get(d)
+    assert a not in store
+    assert {b, c, d} <= set(store._sounds)
+    assert store.total_bytes <= store.max_bytes
+    assert store.evictions == 1
+
+
+def test_lfu_keeps_the_most_played(tmp_path, clips):
+    a, b, c, d = clips
+    store = make_store(tmp_path, clips, "lfu", [a, c, d])
+    for path in (a, a, a, b, c):
+        store.get(path)
+    store.get(d)
+    assert a in store
+    assert b not in store
+    assert store.total_bytes <= store.max_bytes
+
+
+def test_warm_fills_the_budget_without_evicting(tmp_path, clips):
+    a, b, c, d = clips
+    store = make_store(tmp_path, clips, "lru", [a, b])
+    assert store.warm(clips).result() == 2
+    assert set(store._sounds) == {a, b}
+    assert store.evictions == 0
+
+
+def test_decoded_pcm_is_cached_on_disk(tmp_path, clips):
+    cache_dir = tmp_path / "cache"
+    first = ClipStore(str(cache_dir), 10 ** 9)
+    raw = first.get(clips[0]).get_raw()
+    assert len(os.listdir(cache_dir)) == 1
+
+    second = ClipStore(str(cache_dir), 10 ** 9)
+    assert second.get(clips[0]).get_raw() == raw
+
+
+def test_concurrent_loads_of_one_clip(tmp_path, clips):
+    store = ClipStore(str(tmp_path / "cache"), 10 ** 9)
+    store.prefetch(clips)
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(store.get(p) for p in clips)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 16 and all(sound is not None for sound in results)
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.endswith(".tmp")]
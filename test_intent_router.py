@@ -0,0 +1,27 @@
+import pytest
+
+from intent_router import route, SILENCE, STOP, FRUSTRATION, CELEBRATION
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("", SILENCE),
+    ("(wind noise)", SILENCE),
+    ("I want to stop", STOP),
+    ("okay I think I'm done for today, thanks for the help", STOP),
+    ("argh", FRUSTRATION),
+    ("come on!", FRUSTRATION),
+    ("no no no", FRUSTRATION),
+    ("so close", FRUSTRATION),
+    ("yes!", CELEBRATION),
+    ("let's go", CELEBRATION),
+    ("finally", CELEBRATION),
+    # Questions and longer utterances go to the LLM
+    ("why", None),
+    ("why does it keep falling", None),
+    ("how do I get past the pipes", None),
+    ("argh?", None),
+    ("argh I keep hitting the pipe every single time", None),
+    ("tell me a joke", None),
+])
+def test_routing_table(text, intent):
+    assert route(text) == intent
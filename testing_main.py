@@ -9,6 +9,7 @@ from flap import FlappyGame
 from speech_tools import Environment
 from agent_def import flappy_agent
 import agent_audio_manager 
+from audio_scheduler import get_scheduler
 
 def agent_worker(runner, session_id, input_queue, output_queue):
     """
@@ -68,7 +69,7 @@ def main():
         
         # BRIDGE: if LLM is busy, tell the Audio Manager to hold reflexes.
         is_thinking = not agent_input_queue.empty() or not agent_output_queue.empty()
-        agent_audio_manager.set_llm_busy_state(env.is_speaking or is_thinking)
+        agent_audio_manager.set_llm_busy_state(env.is_generating_tts or is_thinking)
 
         # --- Check for User Voice Input ---
         # If we are shutting down, stop listening to the user.
@@ -114,7 +115,7 @@ def main():
         # --- Check for LLM Output ---
         if shutdown_timer is None: # Don't speak new ideas if shutting down
             if not agent_output_queue.empty():
-                if not pygame.mixer.Channel(0).get_busy():
+                if not get_scheduler().is_playing():
                     try:
                         response_text = agent_output_queue.get_nowait()
                         print(f"[AGENT] Idea ready: {response_text}")
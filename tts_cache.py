@@ -0,0 +1,109 @@
+"""
+Content-addressed on-disk cache for synthesized agent speech.
+
+Audio is stored under the SHA-256 of (normalized text, voice, model,
+output format), so a phrase the LLM repeats ("You can do this!") is
+synthesized once and then played straight from disk, with no network
+round trip and no ElevenLabs credits spent.
+
+The index of cached files lives in memory (an OrderedDict in LRU order),
+built once from the directory at startup. Files are written atomically
+(temp file + os.replace), and the least recently used ones are deleted
+once the cache grows past max_bytes. Recency survives restarts through
+the files' mtimes.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so trivially different strings share one entry."""
+    return " ".join(text.split())
+
+
+def cache_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    """Hash naming the cached audio for one phrase in one voice / model / format."""
+    ident = "\0".join((normalize_text(text), voice_id, model_id, output_format))
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()  # fetch threads read and write concurrently
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, oldest first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = []
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith(".tmp"):
+                os.remove(entry.path)  # left over from an interrupted write
+            elif entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def _file_name(key: str, output_format: str) -> str:
+        # "pcm_22050" -> <key>.pcm, "mp3_44100_128" -> <key>.mp3
+        return f"{key}.{output_format.split('_')[0]}"
+
+    def get(self, key: str, output_format: str) -> Optional[bytes]:
+        """Cached audio for a key, or None. A hit becomes the most recently used entry."""
+        name = self._file_name(key, output_format)
+        path = os.path.join(self.cache_dir, name)
+        with self._lock:
+            if name not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(name)
+            self.hits += 1
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # keeps the LRU order across restarts
+            return data
+        except OSError:
+            self._forget(name)
+            return None
+
+    def put(self, key: str, output_format: str, data: bytes) -> None:
+        """Stores audio atomically, then evicts the least recently used files past the budget."""
+        if not data or len(data) > self.max_bytes:
+            return
+        name = self._file_name(key, output_format)
+        path = os.path.join(self.cache_dir, name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self.total_bytes += len(data) - self._index.pop(name, 0)
+            self._index[name] = len(data)
+            evicted = []
+            while self.total_bytes > self.max_bytes:
+                old_name, size = self._index.popitem(last=False)
+                self.total_bytes -= size
+                evicted.append(old_name)
+
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old_name))
+            except OSError:
+                pass
+
+    def _forget(self, name: str) -> None:
+        with self._lock:
+            size = self._index.pop(name, None)
+            if size is not None:
+                self.total_bytes -= size
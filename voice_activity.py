@@ -0,0 +1,109 @@
+"""
+Energy-based voice activity detection and endpointing for player speech.
+
+Endpointer is fed short microphone frames (int16 mono) and decides when an
+utterance starts and ends:
+
+    endpointer = Endpointer(16000)
+    while not endpointer.done:
+        endpointer.push(next_frame())
+    audio = endpointer.utterance  # None if the player never spoke
+
+A frame counts as speech when its level is margin_db above an adaptive
+noise floor (and above an absolute minimum). Recording starts after
+min_speech_sec of speech, keeping pad_sec of audio from before the onset,
+and stops after silence_sec of quiet, at max_speech_sec, or after
+start_timeout_sec without any speech. Silence never reaches STT.
+"""
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+MIN_LEVEL_DB = -50.0  # quieter than this is never speech, whatever the noise floor
+
+
+def frame_level_db(frame: np.ndarray) -> float:
+    """RMS level of an int16 frame in dBFS."""
+    rms = np.sqrt(np.mean(np.square(frame, dtype=np.float64))) if len(frame) else 0.0
+    return 20.0 * np.log10(rms / 32768.0 + 1e-10)
+
+
+class Endpointer:
+    def __init__(self, sample_rate: int,
+                 silence_sec: float = 0.8,
+                 min_speech_sec: float = 0.2,
+                 margin_db: float = 10.0,
+                 pad_sec: float = 0.2,
+                 max_speech_sec: float = 10.0,
+                 start_timeout_sec: float = 5.0):
+        self.sample_rate = sample_rate
+        self.silence_sec = silence_sec
+        self.min_speech_sec = min_speech_sec
+        self.margin_db = margin_db
+        self.max_speech_sec = max_speech_sec
+        self.start_timeout_sec = start_timeout_sec
+
+        self.noise_floor_db: Optional[float] = None
+        self.triggered = False  # speech has started
+        self.done = False
+        self.utterance: Optional[np.ndarray] = None
+
+        self._pre_roll = deque()  # recent frames before the onset (pad + onset run)
+        self._pre_roll_samples = 0
+        self._pad_samples = int(pad_sec * sample_rate)
+        self._frames = []  # frames of the utterance once triggered
+        self._elapsed = 0  # samples seen in total
+        self._speech_run = 0  # consecutive speech samples before triggering
+        self._silence_run = 0  # consecutive silent samples after triggering
+        self._speech_samples = 0
+
+    def is_speech(self, level_db: float) -> bool:
+        floor = self.noise_floor_db if self.noise_floor_db is not None else MIN_LEVEL_DB
+        return level_db > max(MIN_LEVEL_DB, floor + self.margin_db)
+
+    def push(self, frame: np.ndarray) -> None:
+        """Feeds one mono int16 frame (10-30 ms works well)."""
+        if self.done:
+            return
+        n = len(frame)
+        self._elapsed += n
+        level = frame_level_db(frame)
+        speech = self.is_speech(level)
+
+        # The floor tracks the room noise while nobody is talking
+        if not speech:
+            if self.noise_floor_db is None:
+                self.noise_floor_db = level
+            else:
+                self.noise_floor_db += 0.05 * (level - self.noise_floor_db)
+
+        if not self.triggered:
+            self._pre_roll.append(frame.copy())
+            self._pre_roll_samples += n
+            self._speech_run = self._speech_run + n if speech else 0
+            if self._speech_run >= self.min_speech_sec * self.sample_rate:
+                self.triggered = True
+                self._frames = list(self._pre_roll)
+                self._speech_samples = sum(len(f) for f in self._frames)
+                self._pre_roll.clear()
+                return
+            # Only keep the padding plus the current run of speech
+            while self._pre_roll_samples - len(self._pre_roll[0]) >= self._pad_samples + self._speech_run:
+                self._pre_roll_samples -= len(self._pre_roll.popleft())
+            if self._elapsed >= self.start_timeout_sec * self.sample_rate:
+                self.done = True  # nobody spoke: nothing to upload
+            return
+
+        self._frames.append(frame.copy())
+        self._speech_samples += n
+        self._silence_run = 0 if speech else self._silence_run + n
+        if self._silence_run >= self.silence_sec * self.sample_rate or \
+                self._speech_samples >= self.max_speech_sec * self.sample_rate:
+            self.done = True
+
+        if self.done:
+            audio = np.concatenate(self._frames)
+            # Keep pad_sec of the closing silence, drop the rest
+            trim = max(0, self._silence_run - self._pad_samples)
+            self.utterance = audio[:len(audio) - trim]